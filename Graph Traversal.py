@@ -1,16 +1,40 @@
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 from collections import deque
-from matplotlib.animation import FuncAnimation
+from matplotlib.colors import to_rgba
+from blit_animation import BlitAnimation
+from graph_csr import Bitmap, CSRGraph, iter_bfs, iter_dfs
+from graph_layout import LAYOUT_CACHE_DIR, graph_layout
 
 class Graph:
     def __init__(self):
         self.graph = {}
+        # Kept up to date by add_edge for new_visited: one past the largest
+        # vertex, or None once a vertex is not a non-negative int
+        self.num_vertices = 0
+        self.num_edges = 0
 
     def add_edge(self, u, v):
         if u not in self.graph:
             self.graph[u] = []
         self.graph[u].append(v)
+        self.num_edges += 1
+        if self.num_vertices is not None:
+            if type(u) is not int or type(v) is not int or u < 0 or v < 0:
+                self.num_vertices = None
+            else:
+                self.num_vertices = max(self.num_vertices, u + 1, v + 1)
+
+    def edges(self):
+        for u in self.graph:
+            for v in self.graph[u]:
+                yield u, v
+
+    def to_csr(self, num_vertices=None):
+        # Integer vertices only; see graph_csr for loading large graphs directly
+        edges = list(self.edges())
+        return CSRGraph.from_edges([u for u, _ in edges], [v for _, v in edges], num_vertices)
 
     def bfs(self, start):
         visited = set()
@@ -28,32 +52,213 @@ class Graph:
                 traversal_order.append(vertex)
         return traversal_order, traversal_path
 
-    def dfs(self, start, visited=None, traversal_order=None, traversal_path=None):
-        if visited is None:
-            visited = set()
-        if traversal_order is None:
-            traversal_order = []
-        if traversal_path is None:
-            traversal_path = []
-        visited.add(start)
-        traversal_order.append(start)
-        for neighbor in self.graph.get(start, []):
-            if neighbor not in visited:
-                traversal_path.append((start, neighbor))
-                self.dfs(neighbor, visited, traversal_order, traversal_path)
+    def dfs(self, start):
+        traversal_order = []
+        traversal_path = []
+        for parent, vertex, _ in self.iter_dfs(start):
+            traversal_order.append(vertex)
+            if parent is not None:
+                traversal_path.append((parent, vertex))
         return traversal_order, traversal_path
 
+    # Streaming traversals: generators of (parent, vertex, depth), see graph_csr
+    def iter_bfs(self, start, max_depth=None):
+        return iter_bfs(self.neighbors, start, self.new_visited(start), max_depth)
+
+    def iter_dfs(self, start, max_depth=None):
+        return iter_dfs(self.neighbors, start, self.new_visited(start), max_depth)
+
+    def neighbors(self, u):
+        return self.graph.get(u, [])
+
+    def level_bfs(self, sources, max_depth=None):
+        # Vectorized multi-source BFS for integer vertices, returning
+        # distance and parent arrays; see CSRGraph.level_bfs
+        num_vertices = max([u for edge in self.edges() for u in edge] + list(sources)) + 1
+        return self.to_csr(num_vertices).level_bfs(sources, max_depth)
+
+    def new_visited(self, start):
+        # A Bitmap when every vertex is a small non-negative int, else a set
+        if self.num_vertices is None or type(start) is not int or start < 0:
+            return set()
+        size = max(self.num_vertices, start + 1)
+        if size > 64 * (self.num_edges + 1):
+            return set()  # Ids too sparse for a bitmap to pay off
+        return Bitmap(size)
+
 
 # Visualization Function
-def visualize_graph(graph, traversal_order, traversal_path, title, interval=2000):  # Default interval is 2 seconds
-    # Create a NetworkX graph
+# Longest traversal animated one vertex per frame; longer ones skip frames
+MAX_FRAMES = 300
+# Vertices listed in the title, the most recent ones
+TITLE_VERTICES = 20
+
+
+class TraversalAnimation(BlitAnimation):
+    """Plays a traversal on a drawn graph, redrawing only what each step changes.
+
+    Every edge pair maps to its arrow artists once, up front. A frame recolors
+    the edges the traversal entered since the last frame plus the previous and
+    the current vertex, instead of restyling every edge and re-rendering the
+    figure. With blitting the edges, vertices and labels are animated
+    artists, and the axes with the edges but without vertices are kept as an
+    edge layer. A frame draws the entered edges over the edge layer and over
+    the picture, restores the edge layer under each vertex it recolored or
+    drew over, draws those vertices and their labels again and blits. The
+    artists keep their colors too, so a full redraw (e.g. after a resize)
+    shows the same picture.
+    """
+
+    def __init__(self, fig, ax, G, nodes, edge_artists, labels, traversal_order, traversal_path,
+                 title, interval, step):
+        super().__init__(fig, ax, interval)
+        self.nodes = nodes
+        self.edge_artists = list(edge_artists)
+        self.traversal_order = traversal_order
+        self.traversal_path = traversal_path
+        self.title = title
+        self.step = step
+        self.position = 0  # Next traversal_order index to show
+        self.current = None
+        self.edges_shown = 0  # traversal_path entries already colored
+        self.edge_layer = None
+
+        # Arrows of each vertex pair, in both directions since a path edge
+        # also highlights its reverse
+        self.edge_index = {}
+        for artist, (u, v) in zip(edge_artists, G.edges):
+            self.edge_index.setdefault((u, v), []).append(artist)
+            if u != v:
+                self.edge_index.setdefault((v, u), []).append(artist)
+        self.node_list = list(G.nodes)  # In the order nodes draws them
+        self.label_list = list(labels.values())
+        self.node_index = {node: i for i, node in enumerate(self.node_list)}
+        self.node_colors = np.tile(to_rgba("blue"), (len(self.node_index), 1))
+        # Explicit colors from the start, so the first full draw outlines the
+        # vertices the same way later ones do
+        nodes.set_facecolor(self.node_colors)
+
+        # Animated artists are left out of full redraws (see BlitAnimation)
+        for artist in self.animated_artists():
+            artist.set_animated(self.blit)
+
+    def animated_artists(self):
+        return self.edge_artists + [self.nodes] + self.label_list
+
+    def start(self):
+        self.advance()
+        super().start()
+
+    def draw_animated(self):
+        # Measure the pixel box of each vertex and label, then draw the
+        # edges, keep them as the edge layer and draw the vertices and
+        # labels over them
+        canvas, ax = self.fig.canvas, self.ax
+        renderer = canvas.get_renderer()
+        centers = ax.transData.transform(self.nodes.get_offsets())
+        sizes = np.broadcast_to(self.nodes.get_sizes(), len(centers))
+        lines = np.broadcast_to(self.nodes.get_linewidths(), len(centers))
+        radii = ((np.sqrt(sizes) / 2 + lines / 2) * self.fig.dpi / 72 + 1)[:, None]
+        left, bottom, right, top = self.axes_box()
+        self.node_boxes = np.column_stack([np.maximum(np.floor(centers - radii), [left, bottom]),
+                                           np.minimum(np.ceil(centers + radii), [right, top])]).astype(int)
+        self.label_boxes = np.array([text.get_window_extent(renderer).extents for text in self.label_list]
+                                    ).reshape(-1, 4) + [-1, -1, 1, 1]
+        for artist in self.edge_artists:
+            ax.draw_artist(artist)
+        self.edge_layer = canvas.copy_from_bbox(ax.bbox)
+        ax.draw_artist(self.nodes)
+        for text in self.label_list:
+            ax.draw_artist(text)
+
+    def overlapping(self, box, boxes=None):
+        # Vertices (or labels) whose pixel box overlaps box, as a boolean mask
+        x0, y0, x1, y1 = box
+        boxes = self.node_boxes if boxes is None else boxes
+        return (boxes[:, 0] < x1) & (boxes[:, 2] > x0) & (boxes[:, 1] < y1) & (boxes[:, 3] > y0)
+
+    def draw_nodes(self, box):
+        # Draw the vertices and labels reaching into box, clipped to it
+        rows = np.flatnonzero(self.overlapping(box))
+        offsets = self.nodes.get_offsets()
+        colors = self.node_colors[rows]
+        if len(rows) == 1 < len(self.node_list):
+            # A collection of one color is drawn as markers, which Agg
+            # rasterizes a little differently from the whole collection
+            colors = np.repeat(colors, 2, axis=0)
+        self.nodes.set_offsets(offsets[rows])
+        self.nodes.set_facecolor(colors)
+        texts = [self.label_list[i] for i in np.flatnonzero(self.overlapping(box, self.label_boxes))]
+        self.draw_clipped(box, [self.nodes] + texts)
+        self.nodes.set_offsets(offsets)
+        self.nodes.set_facecolor(self.node_colors)
+
+    def advance(self):
+        if self.position >= len(self.traversal_order):
+            self.timer.stop()
+            return False
+        frame = min(self.position + self.step, len(self.traversal_order)) - 1
+        self.position = frame + 1
+
+        # Edges entered up to this frame, as the original frame-indexed view
+        # colored traversal_path[:frame]
+        changed_edges = []
+        for edge in self.traversal_path[self.edges_shown:frame]:
+            for artist in self.edge_index.get(edge, ()):
+                artist.set_color("green")
+                changed_edges.append(artist)
+        self.edges_shown = max(self.edges_shown, frame)
+        # Vertices to repaint: the previous and current one
+        previous, self.current = self.current, self.traversal_order[frame]
+        changed_rows = [self.node_index[node] for node in (previous, self.current) if node in self.node_index]
+        if previous in self.node_index:
+            self.node_colors[self.node_index[previous]] = to_rgba("blue")
+        if self.current in self.node_index:
+            self.node_colors[self.node_index[self.current]] = to_rgba("red")
+        self.nodes.set_facecolor(self.node_colors)
+
+        visited = self.traversal_order[max(0, frame + 1 - TITLE_VERTICES):frame + 1]
+        prefix = "..., " if frame + 1 > TITLE_VERTICES else ""
+        self.ax.set_title(f"{self.title} Traversal: [{prefix}{', '.join(map(repr, visited))}]", fontsize=14)
+
+        if not self.blit or self.background is None:
+            self.fig.canvas.draw_idle()
+            return True
+        canvas, ax = self.fig.canvas, self.ax
+        # The entered edges go on the edge layer, then over the picture
+        picture = canvas.copy_from_bbox(ax.bbox)
+        canvas.restore_region(self.edge_layer)
+        for artist in changed_edges:
+            ax.draw_artist(artist)
+        self.edge_layer = canvas.copy_from_bbox(ax.bbox)
+        canvas.restore_region(picture)
+        renderer = canvas.get_renderer()
+        touched = np.zeros(len(self.node_list), dtype=bool)
+        touched[changed_rows] = True
+        for artist in changed_edges:
+            ax.draw_artist(artist)
+            touched |= self.overlapping(artist.get_window_extent(renderer).extents)
+        # Under each vertex the frame recolored or drew over, the edge layer
+        # comes back, with the vertices and labels reaching into that box
+        for box in self.node_boxes[touched]:
+            self.restore(self.edge_layer, box)
+            self.draw_nodes(box)
+        self.blit_frame()
+        return True
+
+
+def visualize_graph(graph, traversal_order, traversal_path, title, interval=2000, step=None,
+                    layout="auto", layout_cache=LAYOUT_CACHE_DIR):  # Default interval is 2 seconds
+    # graph is a Graph or a graph_csr.CSRGraph. Each frame advances step
+    # vertices; by default long traversals are cut to about MAX_FRAMES frames.
+    # layout is "auto", "spring" or "grid" (see graph_layout); positions are
+    # cached per edge set in memory and under layout_cache (None: memory only)
     G = nx.DiGraph()
-    for u in graph.graph:
-        for v in graph.graph[u]:
-            G.add_edge(u, v)
+    for u, v in graph.edges():
+        G.add_edge(u, v)
 
-    # Use a spring layout for better positioning of nodes
-    pos = nx.spring_layout(G, seed=42)  # Seed ensures consistent layout
+    # Seed ensures consistent layout, shared by every traversal of this graph
+    pos = graph_layout(G, layout, seed=42, cache_dir=layout_cache)
 
     fig, ax = plt.subplots(figsize=(8, 6))
 
@@ -64,27 +269,12 @@ def visualize_graph(graph, traversal_order, traversal_path, title, interval=2000
     nodes = nx.draw_networkx_nodes(G, pos, ax=ax, node_color="blue", node_size=500)
     labels = nx.draw_networkx_labels(G, pos, ax=ax, font_color="white")
 
-    # Animate traversal
-    def update(frame):
-        current_node = traversal_order[frame]
-        visited_nodes = traversal_order[:frame + 1]
-        visited_edges = traversal_path[:frame]
-
-        # Highlight the current node
-        nodes.set_facecolor(["red" if node == current_node else "blue" for node in G.nodes])
-
-        # Highlight the traversal path (edges)
-        for i, edge in enumerate(G.edges):
-            if edge in visited_edges or (edge[1], edge[0]) in visited_edges:  # Handle undirected edges
-                edge_artists[i].set_color("green")
-            else:
-                edge_artists[i].set_color("gray")
-
-        # Update the title to show traversal order
-        ax.set_title(f"{title} Traversal: {visited_nodes}", fontsize=14)
-
-    ani = FuncAnimation(fig, update, frames=len(traversal_order), interval=interval, repeat=False)
+    if step is None:
+        step = max(1, -(-len(traversal_order) // MAX_FRAMES))
+    animation = TraversalAnimation(fig, ax, G, nodes, edge_artists, labels, traversal_order,
+                                   traversal_path, title, interval, step)
     plt.show()
+    return animation
 
 
 # Example Usage
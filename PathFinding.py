@@ -1,5 +1,15 @@
+import os
+import time
+
+import numpy as np
 import pygame
-import heapq
+import pathfinding_core as core
+from pathfinding_alt import Landmarks
+from pathfinding_components import ComponentIndex
+from pathfinding_dstar import DStarLite
+from pathfinding_flow import MOVES, NO_MOVE, FlowField
+from pathfinding_hpa import HierarchicalGrid
+from pathfinding_metrics import search_metrics, write_metrics
 
 # Define colors
 WHITE = (255, 255, 255)
@@ -10,418 +20,320 @@ BLUE = (0, 0, 255)
 GRAY = (200, 200, 200)
 LIGHT_BLUE = (173, 216, 230)  # Open set
 DARK_GRAY = (105, 105, 105)   # Closed set
-
-# Initialize Pygame
-pygame.init()
+ORANGE = (255, 140, 0)        # Flow field arrows
 
 # Screen dimensions
-WIDTH, HEIGHT = 800, 800
-BUTTON_HEIGHT = 100  # Reserve 100 pixels for buttons
+WIDTH, HEIGHT = 800, 850
+BUTTON_HEIGHT = 150  # Reserve 150 pixels for two rows of buttons and a status line
 GRID_HEIGHT = HEIGHT - BUTTON_HEIGHT
 
 # Grid dimensions
 ROWS, COLS = 50, 50
 CELL_SIZE = GRID_HEIGHT // ROWS  # Adjust cell size based on grid height
 
-# Screen setup
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Pathfinding Visualizer")
-
-# Node class for each cell in the grid
-class Node:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.color = WHITE
-        self.neighbors = []
-
-    def get_pos(self):
-        return self.row, self.col
-
-    def is_barrier(self):
-        return self.color == BLACK
-
-    def reset(self):
-        self.color = WHITE
-
-    def make_barrier(self):
-        self.color = BLACK
-
-    def make_start(self):
-        self.color = GREEN
-
-    def make_end(self):
-        self.color = RED
-
-    def make_path(self):
-        self.color = BLUE
-
-    def make_open(self):
-        self.color = LIGHT_BLUE
-
-    def make_closed(self):
-        self.color = DARK_GRAY
-
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.row * CELL_SIZE, self.col * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-
-def heuristic(p1, p2):
-    x1, y1 = p1
-    x2, y2 = p2
-    return abs(x1 - x2) + abs(y1 - y2)
-
-def reconstruct_path(came_from, current, draw):
-    while current in came_from:
-        current = came_from[current]
-        current.make_path()
-        draw()
-
-def reconstruct_bidirectional_path(came_from_start, came_from_end, intersection, draw):
-    # Reconstruct path from start to intersection
-    current = intersection
-    while current in came_from_start:
-        current = came_from_start[current]
-        current.make_path()
-        draw()
-
-    # Reconstruct path from end to intersection
-    current = intersection
-    while current in came_from_end:
-        current = came_from_end[current]
-        current.make_path()
-        draw()
-
-def a_star(draw, grid, start, end):
-    count = 0
-    open_set = []
-    heapq.heappush(open_set, (0, count, start))
-    came_from = {}
-    g_score = {node: float("inf") for row in grid for node in row}
-    g_score[start] = 0
-    f_score = {node: float("inf") for row in grid for node in row}
-    f_score[start] = heuristic(start.get_pos(), end.get_pos())
-
-    open_set_hash = {start}
-
-    while open_set:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        current = heapq.heappop(open_set)[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            return True
-
-        for neighbor in current.neighbors:
-            temp_g_score = g_score[current] + 1
-
-            if temp_g_score < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = temp_g_score
-                f_score[neighbor] = temp_g_score + heuristic(neighbor.get_pos(), end.get_pos())
-                if neighbor not in open_set_hash:
-                    count += 1
-                    heapq.heappush(open_set, (f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open()  # Mark as part of the open set
-
-        draw()
-
-        if current != start:
-            current.make_closed()  # Mark as explored
-
-    return False
-
-def dijkstra(draw, grid, start, end):
-    count = 0
-    open_set = []
-    heapq.heappush(open_set, (0, count, start))
-    came_from = {}
-    g_score = {node: float("inf") for row in grid for node in row}
-    g_score[start] = 0
-
-    open_set_hash = {start}
-
-    while open_set:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        current = heapq.heappop(open_set)[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            return True
-
-        for neighbor in current.neighbors:
-            temp_g_score = g_score[current] + 1
-
-            if temp_g_score < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = temp_g_score
-                if neighbor not in open_set_hash:
-                    count += 1
-                    heapq.heappush(open_set, (g_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open()  # Mark as part of the open set
-
-        draw()
-
-        if current != start:
-            current.make_closed()  # Mark as explored
-
-    return False
-
-def bfs(draw, grid, start, end):
-    queue = [start]
-    visited = set()
-    came_from = {}
-
-    while queue:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        current = queue.pop(0)
-
-        if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            return True
+# Cluster size for the HPA* button, small enough to see clusters on a 50x50 grid
+HPA_CLUSTER_SIZE = 10
 
-        for neighbor in current.neighbors:
-            if neighbor not in visited and not neighbor.is_barrier():
-                queue.append(neighbor)
-                visited.add(neighbor)
-                came_from[neighbor] = current
-                neighbor.make_open()  # Mark as part of the open set
+# Landmarks for the ALT button
+ALT_LANDMARKS = 4
 
-        draw()
-
-        if current != start:
-            current.make_closed()  # Mark as explored
-
-    return False
-
-def dfs(draw, grid, start, end):
-    stack = [start]
-    visited = set()
-    came_from = {}
-
-    while stack:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        current = stack.pop()
-
-        if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            return True
-
-        if current not in visited:
-            visited.add(current)
-
-            for neighbor in current.neighbors:
-                if neighbor not in visited and not neighbor.is_barrier():
-                    stack.append(neighbor)
-                    came_from[neighbor] = current
-                    neighbor.make_open()  # Mark as part of the open set
-
-        draw()
-
-        if current != start:
-            current.make_closed()  # Mark as explored
-
-    return False
-
-def greedy_best_first_search(draw, grid, start, end):
-    count = 0
-    open_set = []
-    heapq.heappush(open_set, (0, count, start))
-    came_from = {}
-    open_set_hash = {start}
-
-    while open_set:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        current = heapq.heappop(open_set)[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            return True
-
-        for neighbor in current.neighbors:
-            if neighbor not in open_set_hash and not neighbor.is_barrier():
-                came_from[neighbor] = current
-                count += 1
-                heapq.heappush(open_set, (heuristic(neighbor.get_pos(), end.get_pos()), count, neighbor))
-                open_set_hash.add(neighbor)
-                neighbor.make_open()
-
-        draw()
-
-        if current != start:
-            current.make_closed()
-
-    return False
-
-def bidirectional_search(draw, grid, start, end):
-    queue_start = [start]
-    queue_end = [end]
-    visited_start = {start}
-    visited_end = {end}
-    came_from_start = {}
-    came_from_end = {}
-
-    def intersect(visited_a, visited_b):
-        return any(node in visited_b for node in visited_a)
-
-    while queue_start and queue_end:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        # Expand from start
-        current_start = queue_start.pop(0)
-        for neighbor in current_start.neighbors:
-            if neighbor not in visited_start and not neighbor.is_barrier():
-                queue_start.append(neighbor)
-                visited_start.add(neighbor)
-                came_from_start[neighbor] = current_start
-                neighbor.make_open()
-                if neighbor in visited_end:  # Intersection found
-                    reconstruct_bidirectional_path(came_from_start, came_from_end, neighbor, draw)
-                    return True
-
-        draw()
-
-        if current_start != start:
-            current_start.make_closed()
-
-        # Expand from end
-        current_end = queue_end.pop(0)
-        for neighbor in current_end.neighbors:
-            if neighbor not in visited_end and not neighbor.is_barrier():
-                queue_end.append(neighbor)
-                visited_end.add(neighbor)
-                came_from_end[neighbor] = current_end
-                neighbor.make_open()
-                if neighbor in visited_start:  # Intersection found
-                    reconstruct_bidirectional_path(came_from_start, came_from_end, neighbor, draw)
-                    return True
-
-        draw()
-
-        if current_end != end:
-            current_end.make_closed()
-
-    return False
-
-def iddfs(draw, grid, start, end):
-    def dls(current, depth, visited, came_from):
-        if current == end:
-            return True
-        if depth == 0:
-            return False
-
-        for neighbor in current.neighbors:
-            if neighbor not in visited and not neighbor.is_barrier():
-                visited.add(neighbor)
-                came_from[neighbor] = current
-                neighbor.make_open()
-                if dls(neighbor, depth - 1, visited, came_from):
-                    return True
-                neighbor.make_closed()
-
-        return False
-
-    max_depth = ROWS * COLS  # Maximum possible depth
-    for depth in range(max_depth):
-        visited = set()
-        came_from = {}
-        if dls(start, depth, visited, came_from):
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            return True
-
-        draw()
-
-    return False
+# Cell states shown by the visualizer, used as indexes into COLORS
+EMPTY, BARRIER, START, END, OPEN, CLOSED, PATH = range(7)
+COLORS = [WHITE, BLACK, GREEN, RED, LIGHT_BLUE, DARK_GRAY, BLUE]
 
 def make_grid(rows, cols):
-    grid = []
-    for i in range(rows):
-        grid.append([])
-        for j in range(cols):
-            node = Node(i, j)
-            grid[i].append(node)
-    return grid
-
-def draw_grid(screen, rows, cols):
-    for i in range(rows):
-        pygame.draw.line(screen, BLACK, (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE))
-        for j in range(cols):
-            pygame.draw.line(screen, BLACK, (j * CELL_SIZE, 0), (j * CELL_SIZE, GRID_HEIGHT))
-
-def draw(screen, grid, rows, cols):
-    screen.fill(WHITE)
-    for row in grid:
-        for node in row:
-            node.draw(screen)
-    draw_grid(screen, rows, cols)
-
-    # Draw buttons
-    draw_button(screen, "A*", 10, GRID_HEIGHT + 10, 80, 40, GRAY if algorithm == "A*" else WHITE)
-    draw_button(screen, "Dijkstra", 100, GRID_HEIGHT + 10, 120, 40, GRAY if algorithm == "Dijkstra" else WHITE)
-    draw_button(screen, "BFS", 230, GRID_HEIGHT + 10, 80, 40, GRAY if algorithm == "BFS" else WHITE)
-    draw_button(screen, "DFS", 320, GRID_HEIGHT + 10, 80, 40, GRAY if algorithm == "DFS" else WHITE)
-    draw_button(screen, "Greedy", 410, GRID_HEIGHT + 10, 120, 40, GRAY if algorithm == "Greedy" else WHITE)
-    draw_button(screen, "Bi-Search", 540, GRID_HEIGHT + 10, 120, 40, GRAY if algorithm == "Bi-Search" else WHITE)
-    draw_button(screen, "IDDFS", 670, GRID_HEIGHT + 10, 80, 40, GRAY if algorithm == "IDDFS" else WHITE)
-
-    pygame.display.update()
-
-def draw_button(screen, text, x, y, width, height, color):
-    pygame.draw.rect(screen, color, (x, y, width, height))
-    font = pygame.font.SysFont(None, 36)
-    text_surface = font.render(text, True, BLACK)
-    screen.blit(text_surface, (x + 10, y + 5))
-
-def update_neighbors(grid):
-    for row in grid:
-        for node in row:
-            node.neighbors = []
-            if node.row > 0 and not grid[node.row - 1][node.col].is_barrier():  # UP
-                node.neighbors.append(grid[node.row - 1][node.col])
-            if node.row < len(grid) - 1 and not grid[node.row + 1][node.col].is_barrier():  # DOWN
-                node.neighbors.append(grid[node.row + 1][node.col])
-            if node.col > 0 and not grid[node.row][node.col - 1].is_barrier():  # LEFT
-                node.neighbors.append(grid[node.row][node.col - 1])
-            if node.col < len(grid[0]) - 1 and not grid[node.row][node.col + 1].is_barrier():  # RIGHT
-                node.neighbors.append(grid[node.row][node.col + 1])
+    # Search grid plus one uint8 display state per cell, both flat
+    return core.Grid(rows, cols), np.zeros(rows * cols, dtype=np.uint8)
+
+def set_cell(grid, state, cell, kind):
+    state[cell] = kind
+    grid.set_barrier(cell, kind == BARRIER)
+
+# Animation pacing: expansions searched per frame, None finishes the search
+# at once. SEARCH_BUDGET_S caps the batch of a frame, so a slow search never
+# stalls the window unless it is asked to finish
+FPS = 60
+SPEEDS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, None]
+DEFAULT_SPEED = 2
+SEARCH_BUDGET_S = 0.5 / FPS
+
+# Display state for each trace event kind (core.OPEN, core.CLOSE, core.STALE)
+TRACE_STATES = np.array([OPEN, CLOSED, CLOSED], dtype=np.uint8)
+
+# Set PATHFINDING_METRICS to a file to append every finished run's metrics
+# to it as one JSON line; unset, nothing is written
+METRICS_PATH = os.environ.get("PATHFINDING_METRICS")
+
+class Playback:
+    """Runs a search a batch of expansions per frame and shows each batch.
+
+    The search is a generator that yields after every traced expansion (see
+    pathfinding_core.stepwise). ``advance`` resumes it for the frame's batch,
+    within SEARCH_BUDGET_S, then applies the events it added to the trace
+    with a few vectorized writes, whatever the batch size. A slow search such
+    as IDA* plays out over many frames while the window keeps handling events,
+    and dropping the playback abandons it. Without a batch size, or once
+    ``finishing`` is set, the search runs to the end and is painted once.
+    """
+
+    def __init__(self, grid, steps, trace, start, end):
+        self.grid = grid
+        self.steps = steps
+        self.trace = trace
+        self.path = None
+        self.start = start
+        self.end = end
+        self.position = 0  # Trace events already shown
+        self.finishing = False  # Set by Enter: finish on the next frame
+        self.done = False
+        # Counters from the trace are added once the search ends, rendering
+        # time frame by frame
+        self.metrics = {"search_s": 0.0, "render_s": 0.0}
+
+    def advance(self, state, expansions=None):
+        began = time.perf_counter()
+        deadline = began + SEARCH_BUDGET_S
+        finished = stopped = False
+        try:
+            if expansions is None or self.finishing:
+                self.path, finished = core.finish(self.steps), True
+            else:
+                count = 0
+                while count < expansions and time.perf_counter() < deadline:
+                    next(self.steps)
+                    count += 1
+        except StopIteration as stop:
+            self.path, finished = stop.value, True
+        except core.NodeLimitReached:
+            finished = stopped = True  # Undecided; show what was searched
+        self.metrics["search_s"] += time.perf_counter() - began
+
+        # Copies, since the trace cannot grow while NumPy holds its buffer.
+        # A cell can appear several times in one batch; its last event wins
+        cells = np.frombuffer(self.trace.cells[self.position:], dtype=np.int32)[::-1]
+        kinds = np.frombuffer(self.trace.kinds[self.position:], dtype=np.int8)[::-1]
+        self.position += len(kinds)
+        cells, last = np.unique(cells, return_index=True)
+        state[cells] = TRACE_STATES[kinds[last]]
+
+        if finished:
+            if self.path:
+                state[self.path[1:-1]] = PATH
+            self.metrics.update(search_metrics(self.grid, self.trace, self.path, stopped))
+            self.done = True
+        state[self.start] = START
+        state[self.end] = END
+
+def notify(indexes, cell):
+    # Tell every incremental structure built on the grid that cell changed
+    for index in indexes.values():
+        index.update_cells((cell,))
+
+def run_search(grid, state, start, end, steps):
+    # steps(trace) starts one query as a generator; Playback runs it
+    state[state >= OPEN] = EMPTY  # Clear the previous run
+    trace = core.SearchTrace()
+    return Playback(grid, steps(trace), trace, start, end)
+
+def metrics_label(record):
+    if record is None:
+        return "Space to search"
+    if record["status"] != "found":
+        path = record["status"]
+    else:
+        path = f"len {record['length']}  cost {record['cost']:g}"
+    return (f"{record['algorithm']}  exp {record['expanded']}  gen {record['generated']}  "
+            f"push {record['pushes']}  stale {record['stale_pops']}  peak {record['peak_open']}  {path}  "
+            f"search {1000 * record['search_s']:.1f}ms  render {1000 * record['render_s']:.0f}ms")
+
+def speed_label(speed):
+    expansions = SPEEDS[speed]
+    text = "instant" if expansions is None else f"{expansions}/frame"
+    return f"Speed: {text}  (Up/Down to change, Enter to finish, F for flow field)"
+
+def make_arrow(dx, dy):
+    # Transparent tile with an arrow pointing (dx, dy) from its center
+    tile = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+    center = CELL_SIZE / 2
+    reach = CELL_SIZE * 0.35 / (dx * dx + dy * dy) ** 0.5
+    tip = (center + dx * reach, center + dy * reach)
+    tail = (center - dx * reach, center - dy * reach)
+    pygame.draw.line(tile, ORANGE, tail, tip, 2)
+    # Head: two short strokes back from the tip, rotated +-45 degrees
+    for sx, sy in ((dx - dy, dy + dx), (dx + dy, dy - dx)):
+        scale = CELL_SIZE * 0.2 / (sx * sx + sy * sy) ** 0.5
+        pygame.draw.line(tile, ORANGE, tip, (tip[0] - sx * scale, tip[1] - sy * scale), 2)
+    return tile
+
+# Algorithm buttons below the grid: (label, x, y, width)
+BUTTON_ROW_HEIGHT = 40
+BUTTONS = [
+    ("A*", 10, GRID_HEIGHT + 10, 80),
+    ("Dijkstra", 100, GRID_HEIGHT + 10, 120),
+    ("BFS", 230, GRID_HEIGHT + 10, 80),
+    ("DFS", 320, GRID_HEIGHT + 10, 80),
+    ("Greedy", 410, GRID_HEIGHT + 10, 120),
+    ("Bi-Search", 540, GRID_HEIGHT + 10, 120),
+    ("IDA*", 670, GRID_HEIGHT + 10, 80),
+    ("JPS", 10, GRID_HEIGHT + 55, 80),
+    ("D* Lite", 100, GRID_HEIGHT + 55, 110),
+    ("HPA*", 220, GRID_HEIGHT + 55, 90),
+    ("ALT", 320, GRID_HEIGHT + 55, 80),
+    ("Bi-A*", 410, GRID_HEIGHT + 55, 80),
+    ("Bi-Dijkstra", 500, GRID_HEIGHT + 55, 140),
+]
+
+# Status line under the buttons
+STATUS_Y = GRID_HEIGHT + 105
+
+def button_at(x, y):
+    for label, bx, by, width in BUTTONS:
+        if bx <= x <= bx + width and by <= y <= by + BUTTON_ROW_HEIGHT:
+            return label
+    return None
+
+def make_button(font, text, width, height, color):
+    surface = pygame.Surface((width, height))
+    surface.fill(color)
+    surface.blit(font.render(text, True, BLACK), (10, 5))
+    return surface
+
+class Renderer:
+    """Draws the visualizer by only touching what changed since the last frame.
+
+    The background, one tile per cell state and both looks of every button are
+    rendered once. Each frame compares the state array against what is on
+    screen, blits the tiles of the changed cells and updates just their
+    rectangles, so a frame costs O(changed cells) instead of O(rows * cols).
+    """
+
+    def __init__(self, screen, rows, cols):
+        self.screen = screen
+        self.rows = rows
+        self.cols = cols
+        self.font = pygame.font.SysFont(None, 36)
+        self.status_font = pygame.font.SysFont(None, 20)
+
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(WHITE)
+        for i in range(rows):
+            pygame.draw.line(self.background, BLACK, (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE))
+
+        # A tile carries its cell's top and left grid line
+        self.tiles = []
+        for color in COLORS:
+            tile = pygame.Surface((CELL_SIZE, CELL_SIZE))
+            tile.fill(color)
+            pygame.draw.line(tile, BLACK, (0, 0), (CELL_SIZE, 0))
+            pygame.draw.line(tile, BLACK, (0, 0), (0, CELL_SIZE))
+            self.tiles.append(tile)
+
+        # Flow field arrows by MOVES code; a cell's row is its x on screen
+        self.arrows = [make_arrow(dr, dc) for dr, dc in MOVES]
+        self.no_arrows = np.full(rows * cols, NO_MOVE, dtype=np.int8)
+
+        self.buttons = {}
+        for label, x, y, width in BUTTONS:
+            self.buttons[label] = (
+                make_button(self.font, label, width, BUTTON_ROW_HEIGHT, WHITE),
+                make_button(self.font, label, width, BUTTON_ROW_HEIGHT, GRAY),
+            )
+
+        self.invalidate()
+
+    def invalidate(self):
+        # Force a full redraw on the next frame
+        self.shown = np.full(self.rows * self.cols, 255, dtype=np.uint8)
+        self.shown_arrows = self.no_arrows.copy()
+        self.shown_algorithm = None
+        self.shown_status = None
+        self.full_redraw = True
+
+    def draw_buttons(self, algorithm):
+        rects = []
+        for label, x, y, width in BUTTONS:
+            surface = self.buttons[label][label == algorithm]
+            rects.append(self.screen.blit(surface, (x, y)))
+        self.shown_algorithm = algorithm
+        return rects
+
+    def draw_status(self, status):
+        rect = pygame.Rect(0, STATUS_Y, WIDTH, HEIGHT - STATUS_Y)
+        self.screen.fill(WHITE, rect)
+        for i, line in enumerate(status.split("\n")):
+            self.screen.blit(self.status_font.render(line, True, BLACK), (10, STATUS_Y + 5 + 18 * i))
+        self.shown_status = status
+        return rect
+
+    def draw(self, state, algorithm, status="", arrows=None):
+        # arrows: optional MOVES code per cell, drawn over the cells
+        screen = self.screen
+        rects = []
+        if self.full_redraw:
+            screen.blit(self.background, (0, 0))
+        if arrows is None:
+            arrows = self.no_arrows
+
+        changed = np.flatnonzero((state != self.shown) | (arrows != self.shown_arrows))
+        if len(changed):
+            tiles = self.tiles
+            cols = self.cols
+            for cell, kind, arrow in zip(changed.tolist(), state[changed].tolist(), arrows[changed].tolist()):
+                row, col = divmod(cell, cols)
+                rect = screen.blit(tiles[kind], (row * CELL_SIZE, col * CELL_SIZE))
+                if arrow != NO_MOVE:
+                    screen.blit(self.arrows[arrow], rect)
+                rects.append(rect)
+            self.shown[changed] = state[changed]
+            self.shown_arrows[changed] = arrows[changed]
+
+        if algorithm != self.shown_algorithm:
+            rects.extend(self.draw_buttons(algorithm))
+        if status != self.shown_status:
+            rects.append(self.draw_status(status))
+
+        if self.full_redraw:
+            pygame.display.update()
+            self.full_redraw = False
+        elif rects:
+            pygame.display.update(rects)
 
 def main():
-    global algorithm
-    grid = make_grid(ROWS, COLS)
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Pathfinding Visualizer")
+
+    renderer = Renderer(screen, ROWS, COLS)
+    clock = pygame.time.Clock()
+    grid, state = make_grid(ROWS, COLS)
     start = None
     end = None
     run = True
     algorithm = "A*"  # Default algorithm
+    playback = None
+    last_run = None  # Metrics of the last finished run
+    speed = DEFAULT_SPEED
+    # Incremental structures kept between runs, by button label; every
+    # search checks the connectivity index first
+    grid.components = ComponentIndex(grid)
+    indexes = {"components": grid.components}
 
     while run:
-        draw(screen, grid, ROWS, COLS)
+        if playback is not None:
+            playback.advance(state, SPEEDS[speed])
+        began = time.perf_counter()
+
+        flow = indexes.get("flow")
+        status = speed_label(speed) + "\n" + metrics_label(last_run)
+        renderer.draw(state, algorithm, status, None if flow is None else flow.direction)
+        if playback is not None:
+            playback.metrics["render_s"] += time.perf_counter() - began
+            if playback.done:
+                last_run = playback.metrics
+                if METRICS_PATH:
+                    write_metrics(METRICS_PATH, [last_run])
+                playback = None
+        clock.tick(FPS)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -432,65 +344,87 @@ def main():
                 x, y = pos
 
                 # Check if a button was clicked
-                if 10 <= x <= 90 and GRID_HEIGHT + 10 <= y <= GRID_HEIGHT + 50:
-                    algorithm = "A*"
-                elif 100 <= x <= 220 and GRID_HEIGHT + 10 <= y <= GRID_HEIGHT + 50:
-                    algorithm = "Dijkstra"
-                elif 230 <= x <= 310 and GRID_HEIGHT + 10 <= y <= GRID_HEIGHT + 50:
-                    algorithm = "BFS"
-                elif 320 <= x <= 400 and GRID_HEIGHT + 10 <= y <= GRID_HEIGHT + 50:
-                    algorithm = "DFS"
-                elif 410 <= x <= 530 and GRID_HEIGHT + 10 <= y <= GRID_HEIGHT + 50:
-                    algorithm = "Greedy"
-                elif 540 <= x <= 660 and GRID_HEIGHT + 10 <= y <= GRID_HEIGHT + 50:
-                    algorithm = "Bi-Search"
-                elif 670 <= x <= 750 and GRID_HEIGHT + 10 <= y <= GRID_HEIGHT + 50:
-                    algorithm = "IDDFS"
+                label = button_at(x, y)
+                if label is not None:
+                    algorithm = label
 
                 # Handle grid interactions
                 elif y < GRID_HEIGHT:
                     row, col = x // CELL_SIZE, y // CELL_SIZE
                     if row < ROWS and col < COLS:
-                        node = grid[row][col]
-                        if not start and node != end:
-                            start = node
-                            start.make_start()
-                        elif not end and node != start:
-                            end = node
-                            end.make_end()
-                        elif node != end and node != start:
-                            node.make_barrier()
+                        playback = None
+                        cell = grid.index(row, col)
+                        if start is None and cell != end:
+                            start = cell
+                            set_cell(grid, state, cell, START)
+                            notify(indexes, cell)
+                        elif end is None and cell != start:
+                            end = cell
+                            set_cell(grid, state, cell, END)
+                            notify(indexes, cell)
+                        elif cell != end and cell != start and state[cell] != BARRIER:
+                            set_cell(grid, state, cell, BARRIER)
+                            notify(indexes, cell)
 
             elif pygame.mouse.get_pressed()[2]:  # Right mouse button
                 pos = pygame.mouse.get_pos()
                 x, y = pos
-                if y < GRID_HEIGHT:
-                    row, col = x // CELL_SIZE, y // CELL_SIZE
-                    node = grid[row][col]
-                    node.reset()
-                    if node == start:
+                row, col = x // CELL_SIZE, y // CELL_SIZE
+                if y < GRID_HEIGHT and row < ROWS and col < COLS:
+                    playback = None
+                    cell = grid.index(row, col)
+                    was_barrier = state[cell] == BARRIER
+                    set_cell(grid, state, cell, EMPTY)
+                    if was_barrier:
+                        notify(indexes, cell)
+                    if cell == start:
                         start = None
-                    elif node == end:
+                    elif cell == end:
                         end = None
+                        indexes.pop("flow", None)  # The field led to this end
 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and start and end:
-                    update_neighbors(grid)
-                    if algorithm == "A*":
-                        a_star(lambda: draw(screen, grid, ROWS, COLS), grid, start, end)
-                    elif algorithm == "Dijkstra":
-                        dijkstra(lambda: draw(screen, grid, ROWS, COLS), grid, start, end)
-                    elif algorithm == "BFS":
-                        bfs(lambda: draw(screen, grid, ROWS, COLS), grid, start, end)
-                    elif algorithm == "DFS":
-                        dfs(lambda: draw(screen, grid, ROWS, COLS), grid, start, end)
-                    elif algorithm == "Greedy":
-                        greedy_best_first_search(lambda: draw(screen, grid, ROWS, COLS), grid, start, end)
-                    elif algorithm == "Bi-Search":
-                        bidirectional_search(lambda: draw(screen, grid, ROWS, COLS), grid, start, end)
-                    elif algorithm == "IDDFS":
-                        iddfs(lambda: draw(screen, grid, ROWS, COLS), grid, start, end)
+                if event.key == pygame.K_SPACE and start is not None and end is not None:
+                    if algorithm == "D* Lite":
+                        planner = indexes.get(algorithm)
+                        if planner is None or planner.end != end:
+                            planner = indexes[algorithm] = DStarLite(grid, start, end)
+                        else:
+                            planner.set_start(start)
+                        playback = run_search(grid, state, start, end, planner.plan_steps)
+                    elif algorithm == "HPA*":
+                        if algorithm not in indexes:
+                            indexes[algorithm] = HierarchicalGrid(grid, HPA_CLUSTER_SIZE)
+                        hierarchy = indexes[algorithm]
+                        playback = run_search(grid, state, start, end,
+                                              lambda trace: hierarchy.find_path_steps(start, end, trace))
+                    elif algorithm == "ALT":
+                        if algorithm not in indexes:
+                            indexes[algorithm] = Landmarks(grid, ALT_LANDMARKS)
+                        landmarks = indexes[algorithm]
+                        playback = run_search(grid, state, start, end,
+                                              lambda trace: landmarks.find_path_steps(start, end, trace))
+                    else:
+                        search = core.ALGORITHMS[algorithm]
+                        playback = run_search(grid, state, start, end,
+                                              lambda trace: search.steps(grid, start, end, trace))
+                    playback.metrics.update(algorithm=algorithm, rows=ROWS, cols=COLS,
+                                            start=grid.pos(start), end=grid.pos(end))
+                elif event.key == pygame.K_f:
+                    # Toggle the flow field towards end; kept in indexes so
+                    # barrier edits repair it while it is shown
+                    if "flow" in indexes:
+                        del indexes["flow"]
+                    elif end is not None:
+                        indexes["flow"] = FlowField(grid, end)
+                elif event.key == pygame.K_UP:
+                    speed = min(speed + 1, len(SPEEDS) - 1)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed - 1, 0)
+                elif event.key == pygame.K_RETURN and playback is not None:
+                    playback.finishing = True  # Finished, and recorded, on the next frame
 
     pygame.quit()
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
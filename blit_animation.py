@@ -0,0 +1,116 @@
+"""Timer-driven figure animations that blit, shared by sorting.py and Graph Traversal.py.
+
+``BlitAnimation`` holds what both visualizers do around their frames. The
+artists a frame changes are animated, so full redraws (the first one, or
+after a resize) leave them out. ``on_draw`` then keeps the clean axes as
+``background`` and the strip above the axes, with the title, as ``strip``,
+and draws the artists back. A frame draws what it changed, over boxes
+put back with ``restore`` or ``redraw``, and shows it, with the new title,
+through ``blit_frame``.
+
+The spines are animated too. In a full redraw they sit on top of the data,
+so ``redraw`` draws them last, clipped to the box it restored. Drawn over
+the old frame instead, their antialiased edges would darken frame after
+frame, and left out, bars or an image touching the edge would hide them.
+"""
+from matplotlib.transforms import Bbox
+
+
+class BlitAnimation:
+    """Base class: plays ``advance`` on a timer, started by the first draw.
+
+    Subclasses make their changing artists animated when ``blit`` is set,
+    list them in drawing order in ``animated_artists`` and return False
+    from ``advance`` once done. Before the first full draw, or without
+    blitting, ``advance`` should call ``draw_idle`` instead.
+    """
+
+    def __init__(self, fig, ax, interval):
+        self.fig = fig
+        self.ax = ax
+        self.blit = fig.canvas.supports_blit
+        for artist in [ax.title] + list(ax.spines.values()):
+            artist.set_animated(self.blit)
+        self.background = None
+        self.strip = None
+
+        self.timer = fig.canvas.new_timer(interval=interval)
+        self.timer.add_callback(self.advance)
+        self.started = False
+        fig.canvas.mpl_connect("draw_event", self.on_draw)
+
+    def animated_artists(self):
+        return []
+
+    def draw_animated(self):
+        # Draws every animated artist back after a full redraw; subclasses
+        # that keep pixel positions of their artists measure them here
+        for artist in self.animated_artists():
+            self.ax.draw_artist(artist)
+
+    def start(self):
+        self.timer.start()
+
+    def advance(self):
+        raise NotImplementedError
+
+    def strip_bbox(self):
+        figure_box, axes_box = self.fig.bbox, self.ax.bbox
+        return Bbox([[figure_box.x0, axes_box.y1], [figure_box.x1, figure_box.y1]])
+
+    def axes_box(self):
+        # The background's box in whole display pixels (x0, y0, x1, y1)
+        # from the bottom left with the ends excluded
+        left, top, right, bottom = self.background.get_extents()  # Rows count from the top here
+        height = int(self.fig.bbox.height)
+        return left, height - bottom, right, height - top
+
+    def draw_clipped(self, box, artists):
+        # Draw artists clipped to box, as given by axes_box; a clip box
+        # covers the same pixels as it is
+        clip = Bbox([[box[0], box[1]], [box[2], box[3]]])
+        for artist in artists:
+            saved = artist.get_clip_box()
+            artist.set_clip_box(clip)
+            self.ax.draw_artist(artist)
+            artist.set_clip_box(saved)
+
+    def restore(self, region, box):
+        # Put back box, as given by axes_box, from a region copied over the
+        # axes. restore_region takes rows from the top with both ends of the
+        # box included
+        x0, y0, x1, y1 = box
+        left, top, _, _ = region.get_extents()
+        height = int(self.fig.bbox.height)
+        self.fig.canvas.restore_region(region, bbox=(x0, height - y1, x1 - 1, height - y0 - 1), xy=(left, top))
+
+    def redraw(self, box, artists):
+        # Restore the clean background inside box, then draw artists and
+        # the spines, clipped to it
+        self.restore(self.background, box)
+        self.draw_clipped(box, artists + list(self.ax.spines.values()))
+
+    def on_draw(self, event):
+        # After a full redraw: remember the axes without the animated
+        # artists and the title strip without the title, then put them back.
+        # The strip keeps the edge of the top spine that reaches into it.
+        # The first draw starts the animation.
+        canvas, ax = self.fig.canvas, self.ax
+        if self.blit:
+            self.background = canvas.copy_from_bbox(ax.bbox)
+            self.draw_animated()
+            for spine in ax.spines.values():
+                ax.draw_artist(spine)
+            self.strip = canvas.copy_from_bbox(self.strip_bbox())
+            ax.draw_artist(ax.title)
+            canvas.blit(self.fig.bbox)
+        if not self.started:
+            self.started = True
+            self.start()
+
+    def blit_frame(self):
+        canvas, ax = self.fig.canvas, self.ax
+        canvas.blit(ax.bbox)
+        canvas.restore_region(self.strip)
+        ax.draw_artist(ax.title)
+        canvas.blit(self.strip_bbox())
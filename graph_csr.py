@@ -0,0 +1,393 @@
+"""Compressed sparse row (CSR) storage for the directed graphs of Graph Traversal.py.
+
+Vertices are the integers ``0 .. num_vertices - 1``. The out-neighbors of
+``u`` are ``indices[indptr[u]:indptr[u + 1]]``, so the whole adjacency is two
+flat NumPy arrays instead of a dict of Python lists: about 4 bytes per edge
+plus 8 per vertex. Every vertex has a row, including those without outgoing
+edges, and duplicate edges are dropped when the arrays are built. Each row
+keeps the order its edges were first added in, so ``bfs`` and ``dfs`` visit
+vertices in the same order as ``Graph`` does for the same edges.
+
+``iter_bfs`` and ``iter_dfs`` are the streaming versions, shared with
+``Graph``: generators of ``(parent, vertex, depth)`` that hold only the
+frontier (or the current DFS branch) and a visited set, which is a Bitmap
+here. The consumer can stop at any point, and ``max_depth`` bounds how far
+from the start they go.
+
+``level_bfs`` is the bulk version for reachability: it expands a whole
+level at a time with NumPy gathers, from any number of sources, and returns
+distance and parent arrays. Small frontiers are expanded top-down, along out
+edges. Once the frontier's edges outnumber a fraction of the unvisited
+vertices' edges it switches to bottom-up steps, where each unvisited vertex
+looks for any in-neighbor in the frontier and stops at the first hit. That
+is the direction-optimizing BFS of Beamer et al.
+
+Usage:
+    python graph_csr.py EDGES [--start V] [--max-depth D] [--output tree.txt]
+
+EDGES is a text edge list, one ``u v`` pair per line separated by spaces,
+tabs or commas (extra columns and lines starting with # or % are ignored),
+or a .npy array of shape (edges, 2).
+"""
+import argparse
+import time
+import warnings
+from collections import deque
+
+import numpy as np
+
+# Edge list lines parsed per chunk while streaming a text file
+CHUNK_LINES = 1 << 20
+
+# Direction-optimizing BFS switches: go bottom-up once the frontier's edges
+# exceed 1/ALPHA of the unvisited vertices' edges, back top-down once the
+# frontier holds under 1/BETA of the vertices (the values from Beamer et al.)
+ALPHA = 14
+BETA = 24
+
+# Bottom-up steps test one in-edge per vertex per pass; vertices still
+# unresolved after this many passes have all their remaining edges tested
+# in one gather
+BOTTOM_UP_PASSES = 8
+
+
+class Bitmap:
+    """Set of the integers 0 .. size - 1, one bit each."""
+
+    def __init__(self, size):
+        self.bits = bytearray((size + 7) >> 3)
+
+    def __contains__(self, value):
+        return self.bits[value >> 3] >> (value & 7) & 1
+
+    def add(self, value):
+        self.bits[value >> 3] |= 1 << (value & 7)
+
+
+def iter_bfs(neighbors, start, visited, max_depth=None):
+    """Yield (parent, vertex, depth) in breadth-first order, lazily.
+
+    neighbors(vertex) gives the out-neighbors and visited is an empty set or
+    Bitmap. The start comes first with parent None; every other vertex comes
+    with the tree edge it was discovered through. Vertices deeper than
+    max_depth are not reached.
+    """
+    visited.add(start)
+    yield None, start, 0
+    queue = deque([(start, 0)])
+    while queue:
+        vertex, depth = queue.popleft()
+        if depth == max_depth:
+            continue
+        for neighbor in neighbors(vertex):
+            if neighbor not in visited:
+                visited.add(neighbor)
+                yield vertex, neighbor, depth + 1
+                queue.append((neighbor, depth + 1))
+
+
+def iter_dfs(neighbors, start, visited, max_depth=None):
+    """Yield (parent, vertex, depth) in depth-first preorder, lazily.
+
+    Same arguments as iter_bfs. The stack holds one neighbor iterator per
+    vertex on the current branch, so depth is not limited by recursion.
+    With max_depth every vertex is still reported once, at the depth it was
+    first reached, which need not be its shallowest.
+    """
+    visited.add(start)
+    yield None, start, 0
+    stack = [(start, iter(neighbors(start)))] if max_depth != 0 else []
+    while stack:
+        vertex, children = stack[-1]
+        for neighbor in children:
+            if neighbor not in visited:
+                visited.add(neighbor)
+                yield vertex, neighbor, len(stack)
+                if len(stack) != max_depth:
+                    stack.append((neighbor, iter(neighbors(neighbor))))
+                break
+        else:
+            stack.pop()
+
+
+class CSRGraph:
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+        self._indptr = memoryview(indptr)
+        self._indices = memoryview(indices)
+
+    @classmethod
+    def from_edges(cls, sources, targets, num_vertices=None):
+        """Build from parallel arrays of edge endpoints u -> v."""
+        sources = np.asarray(sources, dtype=np.int64).ravel()
+        targets = np.asarray(targets, dtype=np.int64).ravel()
+        if len(sources) != len(targets):
+            raise ValueError(f"{len(sources)} sources but {len(targets)} targets")
+        if num_vertices is None:
+            num_vertices = int(max(sources.max(), targets.max())) + 1 if len(sources) else 0
+        if len(sources) and (min(sources.min(), targets.min()) < 0 or
+                             max(sources.max(), targets.max()) >= num_vertices):
+            raise ValueError(f"vertex ids must be in 0..{num_vertices - 1}")
+
+        count = len(sources)
+        if count:
+            # Earliest copy of every distinct edge: group equal edges with an
+            # unstable (fast) sort and take the smallest position in each group
+            keys = sources * num_vertices + targets
+            order = np.argsort(keys)
+            keys = keys[order]
+            groups = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+            first = np.minimum.reduceat(order, groups)
+            del keys, order
+            # Then order by source, and by position within a source, by
+            # sorting both packed into one integer
+            packed = np.sort(sources[first] * count + first)
+            sources, positions = np.divmod(packed, count)
+            targets = targets[positions]
+
+        indptr = np.zeros(num_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_vertices), out=indptr[1:])
+        dtype = np.int32 if num_vertices <= np.iinfo(np.int32).max else np.int64
+        return cls(indptr, targets.astype(dtype))
+
+    @classmethod
+    def from_edge_file(cls, path, num_vertices=None):
+        sources, targets = [], []
+        for chunk in read_edge_chunks(path):
+            # int32 halves the memory held until the arrays are built
+            dtype = np.int32 if chunk.max(initial=0) <= np.iinfo(np.int32).max else np.int64
+            sources.append(chunk[:, 0].astype(dtype))
+            targets.append(chunk[:, 1].astype(dtype))
+        if not sources:
+            return cls.from_edges([], [], num_vertices)
+        return cls.from_edges(np.concatenate(sources), np.concatenate(targets), num_vertices)
+
+    @property
+    def num_vertices(self):
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def neighbors(self, u):
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def row(self, u):
+        # Like neighbors, but a memoryview that yields plain ints
+        return self._indices[self._indptr[u]:self._indptr[u + 1]]
+
+    def iter_bfs(self, start, max_depth=None):
+        return iter_bfs(self.row, start, Bitmap(self.num_vertices), max_depth)
+
+    def iter_dfs(self, start, max_depth=None):
+        return iter_dfs(self.row, start, Bitmap(self.num_vertices), max_depth)
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def transpose(self):
+        # Same vertices with every edge reversed, built once and cached
+        if getattr(self, "_transpose", None) is None:
+            sources = np.repeat(np.arange(self.num_vertices), self.degrees())
+            self._transpose = CSRGraph.from_edges(self.indices, sources, self.num_vertices)
+        return self._transpose
+
+    def level_bfs(self, sources, max_depth=None):
+        """Distance and parent of every vertex from the nearest of sources.
+
+        Unreached vertices have distance -1 and parent -1; a source is its
+        own parent. Each level is one vectorized step, top-down or
+        bottom-up depending on the frontier size (see ALPHA and BETA).
+        """
+        size = self.num_vertices
+        sources = np.unique(np.asarray(sources, dtype=np.int64).ravel())
+        distance = np.full(size, -1, dtype=np.int32)
+        parent = np.full(size, -1, dtype=self.indices.dtype)
+        visited = np.zeros(size, dtype=bool)
+        distance[sources] = 0
+        parent[sources] = sources
+        visited[sources] = True
+
+        degrees = self.degrees()
+        frontier = sources
+        frontier_edges = int(degrees[frontier].sum())
+        unvisited_edges = self.num_edges - frontier_edges
+        bottom_up = False
+        depth = 0
+        while len(frontier) and depth != max_depth:
+            if not bottom_up and frontier_edges > unvisited_edges / ALPHA:
+                bottom_up = True
+            elif bottom_up and len(frontier) < size / BETA:
+                bottom_up = False
+            if bottom_up:
+                in_frontier = np.zeros(size, dtype=bool)
+                in_frontier[frontier] = True
+                frontier, parents = self.transpose().bottom_up_step(in_frontier, np.flatnonzero(~visited))
+            else:
+                frontier, parents = self.top_down_step(frontier, visited)
+            depth += 1
+            visited[frontier] = True
+            distance[frontier] = depth
+            parent[frontier] = parents
+            frontier_edges = int(degrees[frontier].sum())
+            unvisited_edges -= frontier_edges
+        return distance, parent
+
+    def gather(self, vertices, begin=None):
+        # Rows of vertices concatenated, each from position begin on (by
+        # default its first edge): (index into vertices, neighbor) arrays
+        if begin is None:
+            begin = self.indptr[vertices]
+        lengths = self.indptr[vertices + 1] - begin
+        total = int(lengths.sum())
+        # Position of every gathered edge: a ramp that restarts at each row
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.arange(total) + np.repeat(begin - offsets, lengths)
+        return np.repeat(np.arange(len(vertices)), lengths), self.indices[positions]
+
+    def top_down_step(self, frontier, visited):
+        # Out-neighbors of the frontier not yet visited, with one parent each
+        rows, targets = self.gather(frontier)
+        fresh = ~visited[targets]
+        owners, targets = frontier[rows[fresh]], targets[fresh]
+        # Several frontier vertices may reach the same target; whichever
+        # write lands last is its parent, and each target is kept only for
+        # that one edge (edges are unique)
+        winner = np.empty(self.num_vertices, dtype=owners.dtype)
+        winner[targets] = owners
+        keep = winner[targets] == owners
+        return targets[keep], owners[keep]
+
+    def bottom_up_step(self, in_frontier, unvisited):
+        # Called on the transposed graph, whose rows are in-edges: the
+        # unvisited vertices that have an in-neighbor in the frontier, and
+        # that neighbor. Each pass tests the next in-edge of every vertex
+        # still looking, so most vertices stop after their first hits
+        indptr, indices = self.indptr, self.indices
+        found = np.full(len(unvisited), -1, dtype=np.int64)
+        position = indptr[unvisited]
+        end = indptr[unvisited + 1]
+        looking = np.flatnonzero(position < end)
+        for _ in range(BOTTOM_UP_PASSES):
+            if not len(looking):
+                break
+            candidates = indices[position[looking]]
+            hit = in_frontier[candidates]
+            found[looking[hit]] = candidates[hit]
+            position[looking] += 1
+            looking = looking[~hit & (position[looking] < end[looking])]
+        if len(looking):
+            rows, candidates = self.gather(unvisited[looking], position[looking])
+            hit = in_frontier[candidates]
+            found[looking[rows[hit]]] = candidates[hit]
+        reached = found != -1
+        return unvisited[reached], found[reached]
+
+    def edges(self):
+        # (u, v) pairs, row by row
+        indptr, indices = self._indptr, self._indices
+        for u in range(self.num_vertices):
+            for v in indices[indptr[u]:indptr[u + 1]]:
+                yield u, v
+
+    def bfs(self, start):
+        # Same results as Graph.bfs: an edge is recorded whenever its target
+        # is not yet visited, even if the target is already queued
+        indptr, indices = self._indptr, self._indices
+        visited = bytearray(self.num_vertices)
+        queue = deque([start])
+        traversal_order = []
+        traversal_path = []
+        while queue:
+            vertex = queue.popleft()
+            if not visited[vertex]:
+                visited[vertex] = 1
+                for neighbor in indices[indptr[vertex]:indptr[vertex + 1]]:
+                    if not visited[neighbor]:
+                        traversal_path.append((vertex, neighbor))
+                        queue.append(neighbor)
+                traversal_order.append(vertex)
+        return traversal_order, traversal_path
+
+    def dfs(self, start):
+        # Same results as the recursive Graph.dfs, with an explicit stack of
+        # (vertex, next edge position) so depth is not limited by recursion
+        indptr, indices = self._indptr, self._indices
+        visited = bytearray(self.num_vertices)
+        visited[start] = 1
+        traversal_order = [start]
+        traversal_path = []
+        stack = [(start, indptr[start])]
+        while stack:
+            vertex, position = stack[-1]
+            end = indptr[vertex + 1]
+            while position < end and visited[indices[position]]:
+                position += 1
+            if position == end:
+                stack.pop()
+                continue
+            neighbor = indices[position]
+            stack[-1] = (vertex, position + 1)
+            visited[neighbor] = 1
+            traversal_order.append(neighbor)
+            traversal_path.append((vertex, neighbor))
+            stack.append((neighbor, indptr[neighbor]))
+        return traversal_order, traversal_path
+
+
+def read_edge_chunks(path, chunk_lines=CHUNK_LINES):
+    # Yields (n, 2) int64 arrays of edges without reading the whole file
+    if path.endswith(".npy"):
+        edges = np.load(path, mmap_mode="r")
+        if edges.ndim != 2 or edges.shape[1] < 2:
+            raise ValueError(f"{path}: expected an array of shape (edges, 2), got {edges.shape}")
+        for begin in range(0, len(edges), chunk_lines):
+            yield np.asarray(edges[begin:begin + chunk_lines, :2], dtype=np.int64)
+        return
+
+    with open(path) as file:
+        while True:
+            lines = [line.replace(",", " ") for _, line in zip(range(chunk_lines), file)]
+            if not lines:
+                return
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)  # Chunks of only comments
+                chunk = np.loadtxt(lines, dtype=np.int64, usecols=(0, 1), comments=("#", "%"), ndmin=2)
+            if len(chunk):
+                yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load an edge list into CSR form and traverse it.")
+    parser.add_argument("edges", help="text edge list or .npy array of shape (edges, 2)")
+    parser.add_argument("--start", type=int, default=0, help="vertex to start from (default: 0)")
+    parser.add_argument("--max-depth", type=int, help="stop this many edges away from the start")
+    parser.add_argument("--output", help="stream the BFS tree here as 'parent vertex depth' lines")
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    graph = CSRGraph.from_edge_file(args.edges)
+    print(f"{graph.num_vertices} vertices, {graph.num_edges} edges loaded in {time.perf_counter() - began:.2f}s")
+    for name, traverse in (("BFS", graph.iter_bfs), ("DFS", graph.iter_dfs)):
+        began = time.perf_counter()
+        if name == "BFS" and args.output:
+            with open(args.output, "w") as file:
+                reached = 0
+                for parent, vertex, depth in traverse(args.start, args.max_depth):
+                    file.write(f"{-1 if parent is None else parent} {vertex} {depth}\n")
+                    reached += 1
+        else:
+            reached = sum(1 for _ in traverse(args.start, args.max_depth))
+        print(f"{name}: reached {reached} vertices in {time.perf_counter() - began:.2f}s")
+
+    graph.transpose()  # Built once per graph, so kept out of the timing
+    began = time.perf_counter()
+    distance, _ = graph.level_bfs([args.start], args.max_depth)
+    print(f"Level BFS: reached {int((distance >= 0).sum())} vertices, depth {distance.max()}, "
+          f"in {time.perf_counter() - began:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
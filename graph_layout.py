@@ -0,0 +1,184 @@
+"""Node layouts for visualize_graph in Graph Traversal.py, computed once per graph.
+
+``graph_layout`` returns ``{node: (x, y)}`` like ``nx.spring_layout``. The
+result is cached in memory and, as one .npz per graph, on disk. The key is a
+hash of the edge set, the method and the seed, so a BFS and a DFS of the same
+graph, or a second run of the script, reuse the same positions.
+
+Small graphs keep networkx's spring layout. Larger ones use ``grid_layout``,
+a Fruchterman-Reingold force layout in NumPy that uses the original paper's
+grid variant: nodes only repel others within ``2k``, found through a grid
+of that cell size. An iteration then costs O(V + E) instead of O(V^2). Local
+forces alone can't untangle a random start, so it begins from a pivot MDS
+layout that already has the graph's overall shape.
+"""
+import hashlib
+import os
+
+import networkx as nx
+import numpy as np
+
+from graph_csr import CSRGraph
+
+# Largest graph laid out with nx.spring_layout under method="auto"
+SPRING_LIMIT = 300
+
+# Where layouts are stored, one <key>.npz per graph; None keeps them in memory
+LAYOUT_CACHE_DIR = ".graph_layouts"
+
+# Pivots of pivot_layout, the starting point of grid_layout
+PIVOTS = 50
+
+# grid_layout iterations; the temperature cools linearly over them
+ITERATIONS = 50
+
+# Most nodes of one grid cell that push a node in grid_layout
+CELL_SAMPLE = 16
+
+_layouts = {}  # key -> {node: position}
+
+
+def layout_key(G, method, seed):
+    # Edge set and drawing options; insertion order does not matter
+    digest = hashlib.sha1(f"{method}:{seed}".encode())
+    for edge in sorted(repr(edge) for edge in G.edges):
+        digest.update(edge.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def graph_layout(G, method="auto", seed=42, cache_dir=LAYOUT_CACHE_DIR):
+    """Positions of G's nodes: "spring", "grid", or "auto" to pick by size."""
+    if method == "auto":
+        method = "spring" if G.number_of_nodes() <= SPRING_LIMIT else "grid"
+    if method not in ("spring", "grid"):
+        raise ValueError(f"unknown layout method {method!r}, expected 'auto', 'spring' or 'grid'")
+    key = layout_key(G, method, seed)
+    if key in _layouts:
+        return _layouts[key]
+
+    # Rows of a stored layout follow the nodes sorted by repr, which is the
+    # same for every graph with this key
+    nodes = sorted(G.nodes, key=repr)
+    path = None if cache_dir is None else os.path.join(cache_dir, key + ".npz")
+    if path is not None and os.path.exists(path):
+        with np.load(path) as data:
+            positions = data["positions"]
+    else:
+        if method == "spring":
+            layout = nx.spring_layout(G, seed=seed)
+            positions = np.array([layout[node] for node in nodes])
+        else:
+            index = {node: i for i, node in enumerate(nodes)}
+            edges = np.array([(index[u], index[v]) for u, v in G.edges], dtype=np.int64).reshape(-1, 2)
+            positions = grid_layout(len(nodes), edges, seed)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez(path, positions=positions)
+
+    _layouts[key] = dict(zip(nodes, positions))
+    return _layouts[key]
+
+
+def pivot_layout(count, edges, seed=42, pivots=PIVOTS):
+    """Pivot MDS (Brandes and Pich) of count nodes in [0, 1]^2.
+
+    Hop distances from a few pivots, each the node farthest from the ones
+    before it, stand in for the full distance matrix of classical MDS. Each
+    pivot is one graph_csr.CSRGraph.level_bfs, so this is O(pivots * (V + E)).
+    """
+    rng = np.random.default_rng(seed)
+    sources, targets = edges[:, 0], edges[:, 1]
+    graph = CSRGraph.from_edges(np.concatenate([sources, targets]),
+                                np.concatenate([targets, sources]), count)
+    pivots = min(pivots, count)
+    distances = np.empty((count, pivots))
+    nearest = np.full(count, np.inf)
+    pivot = int(rng.integers(count))
+    for column in range(pivots):
+        distance = graph.level_bfs([pivot])[0].astype(float)
+        # Other components sit just beyond the farthest node of this one
+        distance[distance < 0] = distance.max() + 1
+        distances[:, column] = distance
+        nearest = np.minimum(nearest, distance)
+        pivot = int(np.argmax(nearest))
+
+    squared = distances ** 2
+    centered = -0.5 * (squared - squared.mean(axis=0) - squared.mean(axis=1)[:, None] + squared.mean())
+    _, vectors = np.linalg.eigh(centered.T @ centered)
+    positions = centered @ vectors[:, :-3:-1]
+    positions -= positions.min(axis=0)
+    return positions / max(positions.max(), 1e-9)
+
+
+def grid_layout(count, edges, seed=42, iterations=ITERATIONS):
+    """Force layout of count nodes joined by an (E, 2) edge array, in [-1, 1]^2.
+
+    Starts from pivot_layout, then refines it the way Fruchterman-Reingold
+    does: edges attract with d^2 / k and nodes closer than 2k repel with
+    k^2 / d, where k = 1 / sqrt(count) in the unit square. Close pairs come
+    from a grid of 2k cells: nodes are sorted by cell, and each node meets
+    the sorted runs of the nine cells around it, all expanded with array
+    operations. At most CELL_SAMPLE nodes of a crowded cell push, each
+    standing in for its share of the cell.
+    """
+    if count <= 1:
+        return np.zeros((count, 2))
+    rng = np.random.default_rng(seed)
+    k = 1 / np.sqrt(count)
+    radius = 2 * k
+    sources, targets = edges[:, 0], edges[:, 1]
+    loops = sources == targets
+    sources, targets = sources[~loops], targets[~loops]
+    # Jitter separates nodes the pivots can't tell apart
+    positions = pivot_layout(count, edges, seed) + rng.random((count, 2)) * k
+
+    for iteration in range(iterations):
+        temperature = radius * (1 - iteration / iterations)
+        displacement = np.zeros((count, 2))
+
+        # Repulsion between nodes in neighboring cells
+        # Cells count from 1 on both axes, and a column of cells is height
+        # keys apart, so the -1 / +1 neighbors never wrap into another column
+        cells = np.floor(positions / radius).astype(np.int64)
+        cells -= cells.min(axis=0) - 1
+        height = int(cells[:, 1].max()) + 2
+        keys = cells[:, 0] * height + cells[:, 1]
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                neighbor_keys = keys + dx * height + dy
+                begin = np.searchsorted(sorted_keys, neighbor_keys, side="left")
+                found = np.searchsorted(sorted_keys, neighbor_keys, side="right") - begin
+                lengths = np.minimum(found, CELL_SAMPLE)
+                total = int(lengths.sum())
+                if not total:
+                    continue
+                offsets = np.cumsum(lengths) - lengths
+                mine = np.repeat(np.arange(count), lengths)
+                other = order[np.arange(total) + np.repeat(begin - offsets, lengths)]
+                weight = np.repeat(found / np.maximum(lengths, 1), lengths)
+                delta = positions[mine] - positions[other]
+                distance = np.hypot(delta[:, 0], delta[:, 1])
+                close = (mine != other) & (distance < radius)
+                mine, delta, distance = mine[close], delta[close], np.maximum(distance[close], 1e-9)
+                push = delta * (weight[close] * k * k / distance ** 2)[:, None]
+                displacement[:, 0] += np.bincount(mine, push[:, 0], count)
+                displacement[:, 1] += np.bincount(mine, push[:, 1], count)
+
+        # Attraction along edges, pulling both ends together
+        delta = positions[sources] - positions[targets]
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+        pull = delta * (distance / k)[:, None]
+        for axis in (0, 1):
+            displacement[:, axis] += (np.bincount(targets, pull[:, axis], count) -
+                                      np.bincount(sources, pull[:, axis], count))
+
+        # Move at most temperature per iteration
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 1e-9)
+        positions += displacement * (np.minimum(length, temperature) / length)[:, None]
+
+    # Center and scale into [-1, 1] like networkx layouts
+    positions -= positions.mean(axis=0)
+    return positions / max(np.abs(positions).max(), 1e-9)
@@ -0,0 +1,187 @@
+"""ALT heuristic (A*, Landmarks, Triangle inequality) for pathfinding_core.
+
+A few landmark cells are picked far apart from each other and the exact
+distance from each of them to every cell is computed once. For any landmark
+L the triangle inequality gives ``d(n, t) >= d(L, t) - d(L, n)``, and on grids
+without terrain costs, where distances are symmetric, also the reverse
+difference. The largest of these bounds, and of the usual Manhattan/octile
+estimate, is still admissible and consistent but follows walls, so A* stops
+flooding dead ends on maze-like maps.
+
+Tables can be saved next to the map and are only reused when the map they
+were built for is unchanged. Barrier edits go through ``update_cells``, which
+patches every table at the edited cells and marks only the landmarks whose
+distances elsewhere actually change; those are rebuilt before the next query.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+import pathfinding_core as core
+from pathfinding_components import RING
+
+# Landmarks per map; every one costs a full Dijkstra and 4 bytes per cell
+LANDMARK_COUNT = 8
+
+
+def distance_map(grid, source):
+    # With no end to stop at, dijkstra settles every cell reachable from
+    # source; grid.scores() has their exact costs and INF everywhere else
+    core.dijkstra(grid, source, -1)
+    return grid.scores()
+
+
+def grid_key(grid):
+    # Identifies the map a table was built for: barriers, terrain and moves
+    digest = hashlib.sha1(np.ascontiguousarray(grid.blocked != 0).tobytes())
+    if grid.cost is not None:
+        digest.update(grid.cost.tobytes())
+    digest.update(f"{grid.rows}x{grid.cols}:{grid.diagonal}:{grid.corner_cutting}".encode())
+    return digest.hexdigest()
+
+
+def table_path(path):
+    # np.savez adds ".npz" to a path without it, so loads look there too
+    path = os.fspath(path)
+    return path if path.endswith(".npz") else path + ".npz"
+
+
+class Landmarks:
+    def __init__(self, grid, count=LANDMARK_COUNT, path=None):
+        # path, when given, is an .npz file the tables are loaded from if it
+        # matches this grid, and written to after they are built; ".npz" is
+        # added when missing
+        self.grid = grid
+        self.count = count
+        self.path = path
+        self.cells = []
+        self.tables = np.empty((0, grid.size), dtype=np.int32)
+        self.dirty = set()
+        self.target = None  # end cell self.bounds was computed for
+        self.bounds = []
+
+        if path is None or not self.load(path):
+            self.build()
+            if path is not None:
+                self.save(path)
+
+    def build(self):
+        # Farthest-point selection: each landmark is the free cell farthest
+        # from the ones picked so far, cells in unseen regions first
+        grid = self.grid
+        free = np.flatnonzero(grid.blocked == 0)
+        if len(free) == 0:
+            return
+        nearest = distance_map(grid, int(free[0]))
+        cells, tables = [], []
+        for _ in range(min(self.count, len(free))):
+            cell = int(free[np.argmax(nearest[free])])
+            if cell in cells:
+                break
+            table = distance_map(grid, cell)
+            cells.append(cell)
+            tables.append(table)
+            nearest = table if len(cells) == 1 else np.minimum(nearest, table)
+        self.cells = cells
+        self.tables = np.array(tables, dtype=np.int32)
+        self.dirty.clear()
+        self.target = None
+
+    def save(self, path):
+        np.savez(table_path(path), cells=np.array(self.cells, dtype=np.int32), tables=self.tables,
+                 key=np.array(grid_key(self.grid)))
+
+    def load(self, path):
+        # False when the file is missing or was built for another map
+        path = table_path(path)
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            if str(data["key"]) != grid_key(self.grid) or len(data["cells"]) > self.count:
+                return False
+            self.cells = data["cells"].tolist()
+            self.tables = data["tables"]
+        self.dirty.clear()
+        self.target = None
+        return True
+
+    def update_cells(self, cells):
+        # Each table is patched at the edited cells, INF for a new barrier
+        # and the cheapest way in for an opened cell, and then only needs a
+        # rebuild if some cell of their 3x3 blocks, where every added or
+        # removed move ends, no longer has that distance. Distances are the
+        # only solution of those equations, so a table that passes is exact,
+        # and edits off every landmark's shortest paths cost no Dijkstra.
+        # Landmarks that became barriers are replaced on the next refresh
+        grid = self.grid
+        around = set()
+        for cell in cells:
+            row, col = grid.pos(cell)
+            around.add(cell)
+            for dr, dc in RING:
+                if 0 <= row + dr < grid.rows and 0 <= col + dc < grid.cols:
+                    around.add(cell + dr * grid.cols + dc)
+
+        for i, landmark in enumerate(self.cells):
+            if i in self.dirty:
+                continue
+            if grid.is_barrier(landmark):
+                self.dirty.add(i)
+                continue
+            table = memoryview(self.tables[i])
+            for cell in cells:
+                if cell != landmark:
+                    table[cell] = core.INF if grid.is_barrier(cell) else self.cheapest(table, cell)
+            for cell in around:
+                expected = core.INF if grid.is_barrier(cell) else self.cheapest(table, cell)
+                if cell != landmark and table[cell] != expected:
+                    self.dirty.add(i)
+                    break
+        self.target = None
+
+    def cheapest(self, table, cell):
+        # Distance of cell through its cheapest neighbor in table
+        return min((table[neighbor] + step for neighbor, step in self.grid.reverse_neighbor_costs(cell)
+                    if table[neighbor] != core.INF), default=core.INF)
+
+    def refresh(self):
+        if not self.dirty:
+            return
+        if any(self.grid.is_barrier(self.cells[i]) for i in self.dirty):
+            self.build()  # A landmark was walled over; pick a fresh set
+        else:
+            for i in self.dirty:
+                self.tables[i] = distance_map(self.grid, self.cells[i])
+            self.dirty.clear()
+            self.target = None
+        if self.path is not None:
+            self.save(self.path)
+
+    def estimate(self, grid, cell, end):
+        # Same signature as core.heuristic, for a_star(estimate=...)
+        if self.target != end:
+            # Landmarks that cannot reach end bound nothing
+            self.target = end
+            self.bounds = [(memoryview(table), int(table[end])) for table in self.tables
+                           if table[end] != core.INF]
+        symmetric = grid.cost is None
+        best = core.heuristic(grid, cell, end)
+        for table, to_end in self.bounds:
+            to_cell = table[cell]
+            if to_cell == core.INF:
+                continue
+            bound = to_end - to_cell
+            if symmetric and -bound > bound:
+                bound = -bound
+            if bound > best:
+                best = bound
+        return best
+
+    def find_path(self, start, end, trace=None):
+        return core.finish(self.find_path_steps(start, end, trace))
+
+    def find_path_steps(self, start, end, trace=None):
+        # find_path as a generator yielding after every traced expansion
+        self.refresh()
+        return (yield from core.a_star.steps(self.grid, start, end, trace, self.estimate))
@@ -0,0 +1,166 @@
+"""Answer many (start, end) queries against one map in parallel.
+
+The occupancy array, and the terrain costs if the grid has any, are copied
+once into shared memory. Every worker process wraps that buffer in its own
+pathfinding_core.Grid with the same move rules, so tasks only carry the
+query indices, never the map. Results come back columnar: one entry per query
+in ``found``, ``stopped``, ``length`` and ``cost``, and all paths concatenated
+in ``cells`` with query i's path at ``cells[offsets[i]:offsets[i + 1]]``.
+``stopped`` marks queries whose search hit its node limit, for which neither
+a path nor its absence is known.
+
+Usage:
+    python pathfinding_batch.py GRID QUERIES.txt [--algorithm A*] [--workers N] [--output result.npz]
+
+GRID is any file pathfinding_maps.load_grid reads (.map, .grid, .npy). Each
+line of QUERIES.txt holds ``start_row start_col end_row end_col``, separated
+by spaces or commas.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import pathfinding_core as core
+from pathfinding_hpa import HierarchicalGrid
+from pathfinding_maps import load_grid
+
+ALGORITHMS = list(core.ALGORITHMS) + ["HPA*"]
+
+# Per-process state set up by attach()
+_worker = {}
+
+
+def attach(name, rows, cols, diagonal, corner_cutting, weighted, algorithm):
+    # The shared block holds blocked, then cost when weighted
+    memory = shared_memory.SharedMemory(name=name)
+    size = rows * cols
+    blocked = np.ndarray(size, dtype=np.uint8, buffer=memory.buf)
+    cost = np.ndarray(size, dtype=np.uint8, buffer=memory.buf, offset=size) if weighted else None
+    _worker["memory"] = memory  # Keep the mapping alive
+    _worker["grid"] = core.Grid(rows, cols, blocked, diagonal, corner_cutting, cost)
+    _worker["algorithm"] = algorithm
+
+
+def search_function(grid, algorithm, cache):
+    if algorithm == "HPA*":
+        # Built once per process and reused by every query it answers
+        if "hierarchy" not in cache:
+            cache["hierarchy"] = HierarchicalGrid(grid)
+        return lambda grid, start, end: cache["hierarchy"].find_path(start, end)
+    return core.ALGORITHMS[algorithm]
+
+
+def solve_chunk(starts, ends, grid=None, algorithm=None):
+    # Runs in a worker unless grid is given; returns columnar results
+    if grid is None:
+        grid, algorithm, cache = _worker["grid"], _worker["algorithm"], _worker
+    else:
+        cache = {}
+    search = search_function(grid, algorithm, cache)
+    count = len(starts)
+    found = np.zeros(count, dtype=bool)
+    stopped = np.zeros(count, dtype=bool)
+    length = np.full(count, -1, dtype=np.int32)
+    cost = np.full(count, np.nan)
+    sizes = np.zeros(count, dtype=np.int64)
+    paths = []
+    for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        if grid.is_barrier(start) or grid.is_barrier(end):
+            continue
+        try:
+            path = search(grid, start, end)
+        except core.NodeLimitReached:
+            stopped[i] = True
+            continue
+        if path is None:
+            continue
+        found[i] = True
+        length[i] = len(path) - 1
+        cost[i] = core.path_cost(grid, path)
+        sizes[i] = len(path)
+        paths.append(path)
+    cells = np.fromiter((cell for path in paths for cell in path), dtype=np.int32, count=int(sizes.sum()))
+    return found, stopped, length, cost, sizes, cells
+
+
+def combine(chunks):
+    found, stopped, length, cost, sizes, cells = (np.concatenate(column) for column in zip(*chunks))
+    offsets = np.zeros(len(found) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    return {"found": found, "stopped": stopped, "length": length, "cost": cost, "offsets": offsets,
+            "cells": cells}
+
+
+def solve_batch(grid, starts, ends, algorithm="A*", workers=None, chunk_size=None):
+    """Run algorithm for every (starts[i], ends[i]) pair of flat cell indices.
+
+    workers=1 answers the queries in this process; otherwise a process pool
+    of ``workers`` (default: all cores) shares the grid through shared memory.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}")
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(starts) == 0:
+        return combine([solve_chunk(starts, ends, grid, algorithm)])
+
+    # A few chunks per worker keeps them busy when query costs vary a lot
+    chunk_size = chunk_size or max(1, -(-len(starts) // (workers * 4)))
+    bounds = range(0, len(starts), chunk_size)
+
+    weighted = grid.cost is not None
+    memory = shared_memory.SharedMemory(create=True, size=grid.size * (2 if weighted else 1))
+    try:
+        shared = np.ndarray(memory.size, dtype=np.uint8, buffer=memory.buf)
+        shared[:grid.size] = grid.blocked
+        if weighted:
+            shared[grid.size:2 * grid.size] = grid.cost
+        del shared  # The mapping cannot close while a view is alive
+        initargs = (memory.name, grid.rows, grid.cols, grid.diagonal, grid.corner_cutting, weighted, algorithm)
+        with ProcessPoolExecutor(workers, initializer=attach, initargs=initargs) as pool:
+            chunks = list(pool.map(solve_chunk,
+                                   [starts[i:i + chunk_size] for i in bounds],
+                                   [ends[i:i + chunk_size] for i in bounds]))
+    finally:
+        memory.close()
+        memory.unlink()
+    return combine(chunks)
+
+
+def read_queries(path, grid):
+    with open(path) as file:
+        text = file.read().replace(",", " ")
+    values = np.array(text.split(), dtype=np.int64).reshape(-1, 4)
+    starts = values[:, 0] * grid.cols + values[:, 1]
+    ends = values[:, 2] * grid.cols + values[:, 3]
+    return starts, ends
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer many path queries against one grid.")
+    parser.add_argument("grid", help=".map, .grid or .npy grid file")
+    parser.add_argument("queries", help="text file with start_row start_col end_row end_col per line")
+    parser.add_argument("--algorithm", default="A*", choices=ALGORITHMS)
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--output", default="paths.npz", help="where to write the columnar results")
+    args = parser.parse_args()
+
+    grid = load_grid(args.grid)
+    starts, ends = read_queries(args.queries, grid)
+    began = time.perf_counter()
+    result = solve_batch(grid, starts, ends, args.algorithm, args.workers)
+    elapsed = time.perf_counter() - began
+    np.savez(args.output, **result)
+    print(f"{int(result['found'].sum())}/{len(starts)} queries solved with {args.algorithm} "
+          f"in {elapsed:.2f}s ({len(starts) / elapsed:.0f} queries/s), written to {args.output}")
+    if result["stopped"].any():
+        print(f"{int(result['stopped'].sum())} queries stopped at the node limit, undecided")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Benchmark the pathfinding algorithms over .scen scenario files.
+
+Every scenario is answered by every selected algorithm twice: once bare for
+the wall time, and once with a SearchTrace and tracemalloc running for the
+pathfinding_metrics counters (expansions, pushes, stale pops, peak open set)
+and the peak Python/NumPy allocation of the query. Maps are 4-connected and
+the optimality gap is measured against BFS; with --diagonal they allow
+diagonal moves without corner cutting, as the scenario files assume, and
+the gap is measured against the scenario's own octile optimum.
+
+One JSON object per (scenario, algorithm) is written to the report so runs
+can be diffed or loaded into a dataframe, plus one per map for preprocessing
+such as building the HPA* hierarchy or the ALT landmark tables; a
+per-algorithm summary is printed.
+
+Usage:
+    python pathfinding_bench.py SCEN [SCEN ...] [--algorithms A* BFS ...] [--limit N] [--diagonal] [--output report.jsonl]
+"""
+import argparse
+import json
+import math
+import time
+import tracemalloc
+from collections import defaultdict
+
+import pathfinding_core as core
+from pathfinding_alt import Landmarks
+from pathfinding_dstar import d_star_lite
+from pathfinding_hpa import HierarchicalGrid
+from pathfinding_maps import load_map, load_scenarios, scenario_map_path
+from pathfinding_metrics import search_metrics
+
+# Algorithms that only run on 4-connected maps, skipped with --diagonal
+FOUR_CONNECTED = {"D* Lite", "HPA*"}
+
+NAMES = list(core.ALGORITHMS) + ["D* Lite", "HPA*", "ALT"]
+
+
+def algorithms_for(grid, names):
+    # Label -> search(grid, start, end, trace) for one map, plus the time
+    # spent on per-map preprocessing, which is kept out of the query times
+    algorithms = dict(core.ALGORITHMS)
+    algorithms["D* Lite"] = d_star_lite
+    setup = {}
+    if "HPA*" in names:
+        began = time.perf_counter()
+        hierarchy = HierarchicalGrid(grid)
+        setup["HPA*"] = time.perf_counter() - began
+        algorithms["HPA*"] = lambda grid, start, end, trace=None: hierarchy.find_path(start, end, trace)
+    if "ALT" in names:
+        began = time.perf_counter()
+        landmarks = Landmarks(grid)
+        setup["ALT"] = time.perf_counter() - began
+        algorithms["ALT"] = lambda grid, start, end, trace=None: landmarks.find_path(start, end, trace)
+    return {name: algorithms[name] for name in names}, setup
+
+
+def octile_length(grid, path):
+    straight = diagonal = 0
+    for a, b in zip(path, path[1:]):
+        (r1, c1), (r2, c2) = divmod(a, grid.cols), divmod(b, grid.cols)
+        if r1 == r2 or c1 == c2:
+            straight += 1
+        else:
+            diagonal += 1
+    return straight + math.sqrt(2) * diagonal
+
+
+def solve(search, grid, start, end, trace=None):
+    # (path, stopped); a search that hit its node limit has no answer, which
+    # is not the same as no path
+    try:
+        return search(grid, start, end, trace), False
+    except core.NodeLimitReached:
+        return None, True
+
+
+def run_query(search, grid, start, end):
+    began = time.perf_counter()
+    path, stopped = solve(search, grid, start, end)
+    elapsed = time.perf_counter() - began
+
+    trace = core.SearchTrace()
+    tracemalloc.start()
+    solve(search, grid, start, end, trace)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return path, elapsed, search_metrics(grid, trace, path, stopped), peak
+
+
+def benchmark(scen_paths, names=NAMES, limit=None, map_dir=None, diagonal=False):
+    # Yields a "build" record per map and algorithm with preprocessing, then
+    # a "query" record per (scenario, algorithm)
+    if diagonal:
+        names = [name for name in names if name not in FOUR_CONNECTED]
+    for scen_path in scen_paths:
+        scenarios = load_scenarios(scen_path)[:limit]
+        by_map = defaultdict(list)
+        for index, scenario in enumerate(scenarios):
+            by_map[scenario.map_name].append((index, scenario))
+
+        for map_name, entries in by_map.items():
+            grid = load_map(scenario_map_path(scen_path, map_name, map_dir))
+            grid.diagonal = diagonal
+            algorithms, setup = algorithms_for(grid, names)
+            for name, elapsed in setup.items():
+                yield {"kind": "build", "scenario_file": scen_path, "map": map_name,
+                       "algorithm": name, "time_s": elapsed}
+            for index, scenario in entries:
+                if diagonal:
+                    optimum = scenario.optimal
+                else:
+                    reference = core.bfs(grid, scenario.start, scenario.end)
+                    optimum = None if reference is None else len(reference) - 1
+                for name, search in algorithms.items():
+                    path, elapsed, metrics, peak = run_query(search, grid, scenario.start, scenario.end)
+                    if diagonal:
+                        cost = octile_length(grid, path) if path else None
+                    else:
+                        cost = core.path_cost(grid, path) if path else None
+                    if cost is None or optimum is None:
+                        gap = None
+                    else:
+                        gap = cost / optimum - 1 if optimum else 0.0
+                    yield {
+                        "kind": "query",
+                        "scenario_file": scen_path,
+                        "map": map_name,
+                        "index": index,
+                        "bucket": scenario.bucket,
+                        "algorithm": name,
+                        "found": None if metrics["status"] == "node limit" else path is not None,
+                        "status": metrics["status"],
+                        "time_s": elapsed,
+                        "expansions": metrics["expanded"],
+                        "generated": metrics["generated"],
+                        "pushes": metrics["pushes"],
+                        "stale_pops": metrics["stale_pops"],
+                        "peak_open": metrics["peak_open"],
+                        "cost": cost,
+                        "optimal": optimum,
+                        "gap": gap,
+                        "peak_bytes": peak,
+                    }
+
+
+def summarize(records):
+    totals = defaultdict(lambda: {"queries": 0, "stopped": 0, "time_s": 0.0, "expansions": 0, "gap": 0.0,
+                                  "peak_bytes": 0})
+    for record in records:
+        if record["kind"] != "query":
+            continue
+        total = totals[record["algorithm"]]
+        total["queries"] += 1
+        total["stopped"] += record["status"] == "node limit"
+        total["time_s"] += record["time_s"]
+        total["expansions"] += record["expansions"]
+        total["gap"] = max(total["gap"], record["gap"] or 0.0)
+        total["peak_bytes"] = max(total["peak_bytes"], record["peak_bytes"])
+    print(f"{'algorithm':<10} {'queries':>8} {'stopped':>8} {'mean ms':>10} {'mean exp':>10} {'max gap':>8} "
+          f"{'peak KiB':>9}")
+    for name, total in totals.items():
+        count = total["queries"]
+        print(f"{name:<10} {count:>8} {total['stopped']:>8} {1000 * total['time_s'] / count:>10.2f} "
+              f"{total['expansions'] / count:>10.0f} {total['gap']:>8.2%} {total['peak_bytes'] / 1024:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pathfinding algorithms over .scen files.")
+    parser.add_argument("scenarios", nargs="+", help=".scen files")
+    parser.add_argument("--algorithms", nargs="+", default=NAMES, choices=NAMES, help="labels to run (default: all)")
+    parser.add_argument("--limit", type=int, help="only the first N scenarios of each file")
+    parser.add_argument("--map-dir", help="where the .map files live (default: next to each .scen)")
+    parser.add_argument("--diagonal", action="store_true",
+                        help="allow diagonal moves without corner cutting; skips " + ", ".join(sorted(FOUR_CONNECTED)))
+    parser.add_argument("--output", default="bench.jsonl", help="JSON lines report")
+    args = parser.parse_args()
+
+    records = []
+    with open(args.output, "w") as report:
+        for record in benchmark(args.scenarios, args.algorithms, args.limit, args.map_dir, args.diagonal):
+            report.write(json.dumps(record) + "\n")
+            records.append(record)
+    summarize(records)
+
+
+if __name__ == "__main__":
+    main()
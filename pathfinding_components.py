@@ -0,0 +1,181 @@
+"""Connected components of the free cells of a pathfinding_core.Grid.
+
+Attach an index with ``grid.components = ComponentIndex(grid)`` and every
+search answers a query between two different components with ``None``
+straight away instead of flooding the whole reachable area first.
+
+The first labelling is vectorized: free cells are grouped into horizontal
+runs, and runs that touch vertically or diagonally are merged with whole-array
+passes. After that ``update_cells`` keeps the labels current. Opening a cell
+merges the labels around it in a union-find. Closing one can only split its
+component when the free cells around it are not connected through the ring of
+its eight neighbors; such components are relabelled by a flood fill before
+the next query.
+"""
+from collections import deque
+
+import numpy as np
+
+# Ring of cells around a cell, clockwise from UP, so consecutive entries are
+# always a straight step apart
+RING = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+
+
+class ComponentIndex:
+    def __init__(self, grid):
+        self.grid = grid
+        self.labels = np.empty(grid.size, dtype=np.int32)  # -1 on barriers
+        self._labels = memoryview(self.labels)
+        self.parent = {}  # label -> label it was merged into
+        self.next_label = 0
+        self.pending = set()  # Labels of components that may have split
+        self.build()
+
+    def build(self):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        free = (grid.blocked == 0).reshape(rows, cols)
+        starts = free.copy()
+        starts[:, 1:] &= ~free[:, :-1]
+        run = (np.cumsum(starts.ravel()) - 1).reshape(rows, cols)
+        count = int(starts.sum())
+
+        # Run pairs joined by a straight step down, plus diagonal steps on
+        # diagonal grids where the corner rule allows them
+        pairs = [(run[:-1][free[:-1] & free[1:]], run[1:][free[:-1] & free[1:]])]
+        if grid.diagonal:
+            rule = grid.corner_cutting
+            down_right = (free[:-1, :-1] & free[1:, 1:] &
+                          (free[1:, :-1].astype(np.int8) + free[:-1, 1:] >= rule))
+            down_left = (free[:-1, 1:] & free[1:, :-1] &
+                         (free[:-1, :-1].astype(np.int8) + free[1:, 1:] >= rule))
+            pairs.append((run[:-1, :-1][down_right], run[1:, 1:][down_right]))
+            pairs.append((run[:-1, 1:][down_left], run[1:, :-1][down_left]))
+        above = np.concatenate([a for a, _ in pairs])
+        below = np.concatenate([b for _, b in pairs])
+
+        # Min-label hooking with pointer jumping: each round points every
+        # root at the smallest root it touches, then flattens the chains, so
+        # a few whole-array passes stand in for a union-find loop
+        roots = np.arange(count)
+        while True:
+            low = np.minimum(roots[above], roots[below])
+            hooked = roots.copy()
+            np.minimum.at(hooked, roots[above], low)
+            np.minimum.at(hooked, roots[below], low)
+            while True:
+                jumped = hooked[hooked]
+                if (jumped == hooked).all():
+                    break
+                hooked = jumped
+            if (hooked == roots).all():
+                break
+            roots = hooked
+
+        self.labels[:] = np.where(free, roots[run] if count else 0, -1).ravel()
+        self.parent.clear()
+        self.next_label = count
+        self.pending.clear()
+
+    def find(self, label):
+        parent = self.parent
+        root = label
+        while root in parent:
+            root = parent[root]
+        while label != root:  # Path compression
+            parent[label], label = root, parent[label]
+        return root
+
+    def component(self, cell):
+        # Label of cell's component, -1 for a barrier
+        self.refresh()
+        label = self._labels[cell]
+        return label if label == -1 else self.find(label)
+
+    def connected(self, a, b):
+        self.refresh()
+        labels = self._labels
+        if labels[a] == -1 or labels[b] == -1:
+            return False
+        return labels[a] == labels[b] or self.find(labels[a]) == self.find(labels[b])
+
+    def update_cells(self, cells):
+        # Compare each cell with its label, so cells that did not actually
+        # change, like a start being placed, cost nothing
+        grid, labels = self.grid, self._labels
+        for cell in cells:
+            if grid.is_barrier(cell) and labels[cell] != -1:
+                label = labels[cell]
+                labels[cell] = -1
+                if not self.ring_connected(cell):
+                    self.pending.add(label)
+            elif not grid.is_barrier(cell) and labels[cell] == -1:
+                roots = {self.find(labels[neighbor]) for neighbor in grid.neighbors(cell)}
+                roots.discard(-1)
+                if roots:
+                    root = min(roots)
+                    for other in roots:
+                        if other != root:
+                            self.parent[other] = root
+                else:
+                    root = self.next_label
+                    self.next_label += 1
+                labels[cell] = root
+
+    def ring_connected(self, cell):
+        # True when the free cells that could reach each other through cell
+        # still do so along its ring, i.e. closing cell cannot split anything.
+        # Free means labelled: cells closed later in the same update still
+        # count, so a batch is judged one cell at a time
+        grid, labels = self.grid, self._labels
+        row, col = divmod(cell, grid.cols)
+        ring = []
+        for dr, dc in RING:
+            r, c = row + dr, col + dc
+            ring.append(0 <= r < grid.rows and 0 <= c < grid.cols and labels[r * grid.cols + c] != -1)
+        # Orthogonal neighbors always count, diagonal ones only when the grid
+        # can step to them
+        needed = [i for i, is_free in enumerate(ring) if is_free and (i % 2 == 0 or grid.diagonal)]
+        if len(needed) <= 1:
+            return True
+        # Rotate the ring to start on a barrier, then every free run is one
+        # contiguous slice; all needed cells must fall in the same run
+        if all(ring):
+            return True
+        first = ring.index(False)
+        runs = []
+        run = 0
+        for i in range(8):
+            index = (first + i) % 8
+            if not ring[index]:
+                run += 1
+            runs.append((index, run))
+        run_of = dict(runs)
+        return len({run_of[i] for i in needed}) == 1
+
+    def refresh(self):
+        # Flood fill every component that may have split, giving each region
+        # it falls apart into a fresh label
+        if not self.pending:
+            return
+        grid, labels = self.grid, self._labels
+        roots = np.arange(self.next_label, dtype=np.int32)
+        for label in self.parent:
+            roots[label] = self.find(label)
+        split = {self.find(label) for label in self.pending}
+        cells = np.flatnonzero(np.isin(roots[self.labels], list(split)) & (self.labels != -1))
+        fresh = self.next_label
+        for start in cells.tolist():
+            if labels[start] >= fresh:
+                continue
+            label = self.next_label
+            self.next_label += 1
+            labels[start] = label
+            queue = deque([start])
+            while queue:
+                current = queue.popleft()
+                for neighbor in grid.neighbors(current):
+                    if labels[neighbor] < fresh:
+                        labels[neighbor] = label
+                        queue.append(neighbor)
+        self.pending.clear()
@@ -0,0 +1,1046 @@
+"""Headless grid search used by PathFinding.py.
+
+Nothing in here touches pygame. Cells are identified by a flat index
+(``row * cols + col``) and every search returns the path as a list of flat
+indices from start to end, or ``None`` when end cannot be reached. Passing a
+``SearchTrace`` records the open/close events so a visualizer can show them
+without redrawing from inside the search loop. Each search is a generator
+underneath that yields after every traced expansion: calling it runs to the
+end, while ``search.steps(...)`` hands out the generator so a visualizer can
+run the search a few expansions per frame.
+
+Grids may carry per-cell terrain costs and allow diagonal moves. A*, Dijkstra,
+their bidirectional versions, IDA* and JPS return the cheapest path under
+those costs; BFS, DFS, Greedy and Bi-Search follow the same moves but count
+steps, not cost.
+"""
+import heapq
+from array import array
+from collections import deque
+from functools import wraps
+from itertools import repeat
+
+import numpy as np
+
+# Largest int32, used as "unreached" in the score arrays
+INF = np.iinfo(np.int32).max
+
+# Trace event kinds; STALE is an outdated queue entry popped and skipped
+OPEN = 0
+CLOSE = 1
+STALE = 2
+
+# Move costs when diagonal moves are allowed, an integer octile metric
+STRAIGHT_COST = 10
+DIAGONAL_COST = 14
+
+# Grid.corner_cutting: how many of the two cells beside a diagonal step must
+# be free for the step to be allowed
+CUT_NEVER = 2
+CUT_ONE_SIDE = 1
+CUT_ALWAYS = 0
+
+# Transposition table entries of ida_star
+TABLE_SIZE = 1 << 18
+
+# Expansions ida_star may spend, over all iterations, before giving up
+IDA_NODE_LIMIT = 1_000_000
+
+# Bits of Grid.flags, below the search generation kept in the bits above
+VISITED = 1
+VISITED_REVERSE = 2
+FLAG_BITS = 2
+
+
+class NodeLimitReached(Exception):
+    """A search ran out of its node budget before it could tell whether a
+    path exists; unlike a None result this says nothing about reachability."""
+
+
+class Grid:
+    """Occupancy and per-query search state stored as flat NumPy arrays.
+
+    The score, parent and flag arrays are allocated once, so repeated
+    queries on the same map allocate nothing per cell, and are not cleared
+    between queries either. Instead ``begin_search`` hands out a new mark,
+    the query's generation shifted above the flag bits, and a cell's entries
+    are only current while ``flags[cell] >= mark``. A search touching a cell
+    for the first time stamps it and resets its score; untouched cells are
+    never read. Searches index the arrays through memoryviews, which hand back
+    plain ints and are noticeably cheaper than NumPy scalar indexing inside
+    Python loops.
+    """
+
+    def __init__(self, rows, cols, blocked=None, diagonal=False, corner_cutting=CUT_NEVER, cost=None):
+        # blocked and cost may be existing flat uint8 arrays, e.g. views on
+        # shared memory; the grid then reads and writes them in place
+        self.rows = rows
+        self.cols = cols
+        self.diagonal = diagonal
+        self.corner_cutting = corner_cutting
+        size = rows * cols
+        self.blocked = np.zeros(size, dtype=np.uint8) if blocked is None else blocked
+        self.g_score = np.empty(size, dtype=np.int32)
+        self.came_from = np.empty(size, dtype=np.int32)
+        self.flags = np.zeros(size, dtype=np.uint16)
+        self.mark = 0  # Stamp of the latest search, see begin_search
+        self.g_score_reverse = None
+        self.came_from_reverse = None
+        self._blocked = memoryview(self.blocked)
+        # Cost of entering each cell, uint8 and at least 1; None while every
+        # cell costs 1, so uniform grids skip the lookups entirely
+        self.cost = cost
+        self._cost = None if cost is None else memoryview(cost)
+        # Optional connectivity index, see pathfinding_components
+        self.components = None
+        # JumpTable of the latest jump_point_search
+        self.jumps = None
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    def index(self, row, col):
+        return row * self.cols + col
+
+    def pos(self, cell):
+        return divmod(cell, self.cols)
+
+    def is_barrier(self, cell):
+        return self._blocked[cell] != 0
+
+    def set_barrier(self, cell, barrier=True):
+        self._blocked[cell] = 1 if barrier else 0
+
+    def set_cost(self, cell, cost):
+        if self.cost is None:
+            self.cost = np.ones(self.size, dtype=np.uint8)
+            self._cost = memoryview(self.cost)
+        self._cost[cell] = cost
+
+    def max_step_cost(self):
+        top = 1 if self.cost is None else int(self.cost.max())
+        return top * DIAGONAL_COST if self.diagonal else top
+
+    def neighbors(self, cell):
+        # UP, DOWN, LEFT, RIGHT as the visualizer always used, then the
+        # diagonals when they are enabled
+        result = self.straight_neighbors(cell)
+        if self.diagonal:
+            result += self.diagonal_neighbors(cell)
+        return result
+
+    def straight_neighbors(self, cell):
+        cols = self.cols
+        blocked = self._blocked
+        row, col = divmod(cell, cols)
+        result = []
+        if row > 0 and not blocked[cell - cols]:
+            result.append(cell - cols)
+        if row < self.rows - 1 and not blocked[cell + cols]:
+            result.append(cell + cols)
+        if col > 0 and not blocked[cell - 1]:
+            result.append(cell - 1)
+        if col < cols - 1 and not blocked[cell + 1]:
+            result.append(cell + 1)
+        return result
+
+    def diagonal_neighbors(self, cell):
+        # UP-LEFT, UP-RIGHT, DOWN-LEFT, DOWN-RIGHT, allowed by corner_cutting
+        cols = self.cols
+        blocked = self._blocked
+        row, col = divmod(cell, cols)
+        result = []
+        for dr, dc in ((-1, -1), (-1, 1), (1, -1), (1, 1)):
+            if not (0 <= row + dr < self.rows and 0 <= col + dc < cols):
+                continue
+            neighbor = cell + dr * cols + dc
+            if blocked[neighbor]:
+                continue
+            sides = (not blocked[cell + dr * cols]) + (not blocked[cell + dc])
+            if sides >= self.corner_cutting:
+                result.append(neighbor)
+        return result
+
+    def neighbor_costs(self, cell):
+        # (neighbor, cost of stepping into it) pairs in neighbors() order
+        cost = self._cost
+        if not self.diagonal:
+            if cost is None:
+                return zip(self.straight_neighbors(cell), repeat(1))
+            return [(neighbor, cost[neighbor]) for neighbor in self.straight_neighbors(cell)]
+        if cost is None:
+            return ([(neighbor, STRAIGHT_COST) for neighbor in self.straight_neighbors(cell)] +
+                    [(neighbor, DIAGONAL_COST) for neighbor in self.diagonal_neighbors(cell)])
+        return ([(neighbor, STRAIGHT_COST * cost[neighbor]) for neighbor in self.straight_neighbors(cell)] +
+                [(neighbor, DIAGONAL_COST * cost[neighbor]) for neighbor in self.diagonal_neighbors(cell)])
+
+    def reverse_neighbor_costs(self, cell):
+        # (neighbor, cost of stepping from it into cell) pairs for searches
+        # that run backwards. Moves are symmetric, but a step costs the
+        # terrain of the cell it enters, here always cell
+        if self._cost is None:
+            return self.neighbor_costs(cell)
+        terrain = self._cost[cell]
+        if not self.diagonal:
+            return [(neighbor, terrain) for neighbor in self.straight_neighbors(cell)]
+        return ([(neighbor, STRAIGHT_COST * terrain) for neighbor in self.straight_neighbors(cell)] +
+                [(neighbor, DIAGONAL_COST * terrain) for neighbor in self.diagonal_neighbors(cell)])
+
+    def begin_search(self):
+        # Start a new generation and return memoryviews over the reusable
+        # arrays plus the mark that stamps this query's cells. Only when the
+        # generations run out of uint16 are the flags cleared, once every
+        # 16383 queries
+        self.mark += 1 << FLAG_BITS
+        if self.mark > np.iinfo(self.flags.dtype).max:
+            self.flags.fill(0)
+            self.mark = 1 << FLAG_BITS
+        return (memoryview(self.g_score), memoryview(self.came_from),
+                memoryview(self.flags), self.mark)
+
+    def begin_reverse_search(self):
+        # Score and parent arrays for the backward half of a bidirectional
+        # search, only allocated by the searches that need them. They share
+        # the stamps of begin_search, so a search resets both halves of a
+        # cell when it first touches it
+        if self.came_from_reverse is None:
+            self.g_score_reverse = np.empty(self.size, dtype=np.int32)
+            self.came_from_reverse = np.empty(self.size, dtype=np.int32)
+        return memoryview(self.g_score_reverse), memoryview(self.came_from_reverse)
+
+    def scores(self):
+        # g_score of the latest search, INF where it never reached
+        return np.where(self.flags >= self.mark, self.g_score, INF)
+
+
+class SearchTrace:
+    """Open/close/stale events of one search stored as two flat integer arrays.
+
+    ``generated`` adds up the successors each search reports with its close
+    events, counted where the search generates them.
+    """
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.cells = array("i")
+        self.generated = 0
+
+    def open(self, cell):
+        self.kinds.append(OPEN)
+        self.cells.append(cell)
+
+    def close(self, cell, generated=0):
+        self.kinds.append(CLOSE)
+        self.cells.append(cell)
+        self.generated += generated
+
+    def stale(self, cell):
+        self.kinds.append(STALE)
+        self.cells.append(cell)
+
+    def clear(self):
+        del self.kinds[:]
+        del self.cells[:]
+        self.generated = 0
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        return zip(self.kinds, self.cells)
+
+
+def finish(steps):
+    # Run a search generator to the end and return its path
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
+
+
+def stepwise(search):
+    # Turn a generator search into a plain function that returns its path,
+    # keeping the generator as search.steps. Untraced runs never yield, so
+    # they cost a single resume
+    @wraps(search)
+    def run(*args, **kwargs):
+        return finish(search(*args, **kwargs))
+    run.steps = search
+    return run
+
+
+def manhattan(grid, a, b):
+    r1, c1 = divmod(a, grid.cols)
+    r2, c2 = divmod(b, grid.cols)
+    return abs(r1 - r2) + abs(c1 - c2)
+
+
+def octile(grid, a, b):
+    r1, c1 = divmod(a, grid.cols)
+    r2, c2 = divmod(b, grid.cols)
+    dr, dc = abs(r1 - r2), abs(c1 - c2)
+    return STRAIGHT_COST * max(dr, dc) + (DIAGONAL_COST - STRAIGHT_COST) * min(dr, dc)
+
+
+def heuristic(grid, a, b):
+    # Lower bound in the units of Grid.neighbor_costs; terrain costs are
+    # at least 1, so both metrics stay admissible and consistent
+    return octile(grid, a, b) if grid.diagonal else manhattan(grid, a, b)
+
+
+def unreachable(grid, start, end):
+    # True when the grid's connectivity index already rules out any path. A
+    # negative end, as in a full dijkstra sweep, is never ruled out
+    return end >= 0 and grid.components is not None and not grid.components.connected(start, end)
+
+
+def reconstruct_path(came_from, end):
+    path = [end]
+    current = came_from[end]
+    while current != -1:
+        path.append(current)
+        current = came_from[current]
+    path.reverse()
+    return path
+
+
+def reconstruct_bidirectional_path(came_from_start, came_from_end, meet):
+    path = reconstruct_path(came_from_start, meet)
+    current = came_from_end[meet]
+    while current != -1:
+        path.append(current)
+        current = came_from_end[current]
+    return path
+
+
+def path_cost(grid, path):
+    # Terrain cost of every entered cell, times DIAGONAL_COST / STRAIGHT_COST
+    # for diagonal steps. Both kinds are summed as integers and divided once,
+    # so the result equals the searches' g / STRAIGHT_COST exactly; paths
+    # without diagonal steps cost an int
+    terrain = grid._cost
+    straight = diagonal = 0
+    for a, b in zip(path, path[1:]):
+        (r1, c1), (r2, c2) = divmod(a, grid.cols), divmod(b, grid.cols)
+        step = 1 if terrain is None else terrain[b]
+        if r1 == r2 or c1 == c2:
+            straight += step
+        else:
+            diagonal += step
+    if not diagonal:
+        return straight
+    return (STRAIGHT_COST * straight + DIAGONAL_COST * diagonal) / STRAIGHT_COST
+
+
+@stepwise
+def a_star(grid, start, end, trace=None, estimate=heuristic):
+    # estimate(grid, cell, end) must be consistent, e.g. Landmarks.estimate
+    if unreachable(grid, start, end):
+        return None
+    g_score, came_from, flags, mark = grid.begin_search()
+    # Dial's buckets instead of a heap: with a consistent heuristic the
+    # popped f never decreases and a push is at most one step cost plus one
+    # heuristic change above it, so the live keys land in distinct slots of
+    # a ring of span + 1 lists. Costs are uint8, which keeps the ring small.
+    size = 2 * grid.max_step_cost() + 1
+    buckets = [[] for _ in range(size)]
+    key = estimate(grid, start, end)
+    buckets[key % size].append(start)
+    pending = 1
+    g_score[start] = 0
+    came_from[start] = -1
+    flags[start] = mark
+
+    while pending:
+        bucket = buckets[key % size]
+        while not bucket:
+            key += 1
+            bucket = buckets[key % size]
+        current = bucket.pop()
+        pending -= 1
+        if flags[current] != mark:  # Stale entry, already expanded with a better score
+            if trace is not None:
+                trace.stale(current)
+            continue
+        flags[current] = mark | VISITED  # VISITED marks the closed set here
+
+        if current == end:
+            return reconstruct_path(came_from, end)
+
+        g = g_score[current]
+        for neighbor, step in grid.neighbor_costs(current):
+            if flags[neighbor] < mark:  # First touch this query
+                flags[neighbor] = mark
+                g_score[neighbor] = INF
+            temp_g_score = g + step
+            if temp_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = temp_g_score
+                buckets[(temp_g_score + estimate(grid, neighbor, end)) % size].append(neighbor)
+                pending += 1
+                if trace is not None:
+                    trace.open(neighbor)
+
+        if trace is not None and current != start:
+            # Every neighbor was generated; neighbor_costs may be a zip
+            # without a length, so only traced runs count them again
+            trace.close(current, len(grid.neighbors(current)))
+            yield
+
+    return None
+
+
+class JumpTable:
+    """Distance from every cell to the end of its straight run, per direction.
+
+    ``tables[(dr, dc)][cell]`` is ``d > 0`` when a straight jump from cell
+    stops at the jump point ``d`` steps away, and ``-d`` when the run is
+    blocked ``d`` steps away, so cells 1 .. d - 1 steps away are free. A jump
+    point is a cell with a forced neighbor under the no corner cutting rules.
+    ``vertical[(dr, 0)]`` is the same for 4-connected moves, where a vertical
+    jump also stops at every cell that has a horizontal jump point in either
+    direction. The tables are built for all cells at once with whole-row NumPy
+    scans and turn every straight scan of jump_point_search into one lookup.
+    """
+
+    def __init__(self, grid):
+        self.blocked = grid.blocked.copy()
+        free = np.pad(grid.blocked.reshape(grid.rows, grid.cols) == 0, 1)
+        right = self.right_jumps(free)
+        left = self.right_jumps(free[:, ::-1])[:, ::-1]
+        down = self.right_jumps(free.T).T
+        up = self.right_jumps(free.T[:, ::-1])[:, ::-1].T
+        branches = ((right > 0) | (left > 0)).T
+        down_branching = self.right_jumps(free.T, branches).T
+        up_branching = self.right_jumps(free.T[:, ::-1], branches[:, ::-1])[:, ::-1].T
+        self.tables = {}
+        for direction, table in (((0, 1), right), ((0, -1), left), ((1, 0), down), ((-1, 0), up)):
+            self.tables[direction] = self.flatten(table)
+        self.vertical = {(1, 0): self.flatten(down_branching), (-1, 0): self.flatten(up_branching)}
+
+    @staticmethod
+    def flatten(table):
+        return memoryview(np.ascontiguousarray(table[1:-1, 1:-1], dtype=np.int32).ravel())
+
+    @staticmethod
+    def right_jumps(free, branches=None):
+        # Table for moving right on a (rows, cols) free mask padded with a
+        # blocked border; the other directions flip and transpose the mask.
+        # branches marks extra cells a jump stops at
+        rows, cols = free.shape
+        forced = np.zeros_like(free)
+        forced[1:-1, 1:] = free[1:-1, 1:] & ((free[:-2, 1:] & ~free[:-2, :-1]) |
+                                             (free[2:, 1:] & ~free[2:, :-1]))
+        if branches is not None:
+            forced |= free & branches
+        columns = np.arange(cols)
+        stops = np.where(~free | forced, columns, cols - 1)
+        # First stop strictly right of each column, by a reversed running min
+        following = np.full(free.shape, cols - 1)
+        following[:, :-1] = np.minimum.accumulate(stops[:, :0:-1], axis=1)[:, ::-1]
+        distance = following - columns
+        walled = ~free[np.arange(rows)[:, None], following]
+        return np.where(walled, -distance, distance)
+
+    def current(self, grid):
+        return np.array_equal(self.blocked, grid.blocked)
+
+
+@stepwise
+def jump_point_search(grid, start, end, trace=None):
+    """A* over jump points for uniform-cost grids.
+
+    Straight runs and diagonals with no forced neighbors are skipped, so only
+    the cells where the optimal path may turn are pushed on the heap. Straight
+    runs are looked up in the grid's JumpTable, built on first use and again
+    after barrier edits; diagonals are walked a cell at a time, with two
+    lookups per cell. On 4-connected grids a vertical jump also stops where a
+    horizontal branch finds something, which the table covers except for the
+    end's own row, checked once per jump. The returned path contains every
+    cell, not just the jump points. Jumps cannot price terrain, and the
+    diagonal forced neighbor rules are those of CUT_NEVER, so terrain grids
+    and diagonal grids that cut corners fall back to a_star.
+    """
+    if grid.cost is not None or (grid.diagonal and grid.corner_cutting != CUT_NEVER):
+        return (yield from a_star.steps(grid, start, end, trace))
+    if unreachable(grid, start, end):
+        return None
+    if grid.jumps is None or not grid.jumps.current(grid):
+        grid.jumps = JumpTable(grid)
+    tables = grid.jumps.tables
+    vertical = grid.jumps.vertical
+    diagonal = grid.diagonal
+    cols = grid.cols
+    blocked = grid._blocked
+    end_row, end_col = divmod(end, cols)
+
+    def jump_straight(cell, dr, dc):
+        # Jump point or end reached from cell in a straight line, or -1
+        distance = tables[dr, dc][cell]
+        row, col = divmod(cell, cols)
+        if dr:
+            steps = (end_row - row) * dr if col == end_col else 0
+        else:
+            steps = (end_col - col) * dc if row == end_row else 0
+        if 0 < steps and (steps <= distance or steps < -distance):
+            return end
+        return cell + distance * (dr * cols + dc) if distance > 0 else -1
+
+    def jump_vertical(cell, dr):
+        # 4-connected vertical jump: the table stops at forced neighbors and
+        # horizontal jump points; the end can still be found by a horizontal
+        # branch from the cell where the run crosses its row
+        distance = vertical[dr, 0][cell]
+        row, col = divmod(cell, cols)
+        steps = (end_row - row) * dr
+        if 0 < steps and (steps <= distance or steps < -distance):
+            crossing = cell + steps * dr * cols
+            if crossing == end or jump_straight(crossing, 0, 1 if end_col > col else -1) == end:
+                return crossing
+        return cell + distance * dr * cols if distance > 0 else -1
+
+    def jump_diagonal(cell, dr, dc):
+        vertical = tables[dr, 0]
+        horizontal = tables[0, dc]
+        step = dr * cols + dc
+        while True:
+            # No corner cutting: both cells beside the step must be free,
+            # which also keeps it inside the grid
+            if vertical[cell] == -1 or horizontal[cell] == -1 or blocked[cell + step]:
+                return -1
+            cell += step
+            if cell == end:
+                return cell
+            if jump_straight(cell, dr, 0) != -1 or jump_straight(cell, 0, dc) != -1:
+                return cell
+
+    def directions(cell, parent):
+        # Pruned set of directions to scan from cell, given how it was reached
+        if parent == -1:
+            if not diagonal:
+                return [(-1, 0), (1, 0), (0, -1), (0, 1)]
+            return [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+        row, col = divmod(cell, cols)
+        parent_row, parent_col = divmod(parent, cols)
+        dr = (row > parent_row) - (row < parent_row)
+        dc = (col > parent_col) - (col < parent_col)
+        if not diagonal:
+            return [(dr, 0), (0, -1), (0, 1)] if dr else [(0, dc), (-1, 0), (1, 0)]
+        if dr and dc:
+            return [(dr, 0), (0, dc), (dr, dc)]
+        if dr:
+            return [(dr, 0), (dr, -1), (dr, 1), (0, -1), (0, 1)]
+        return [(0, dc), (-1, dc), (1, dc), (-1, 0), (1, 0)]
+
+    step_cost = STRAIGHT_COST if diagonal else 1
+    g_score, came_from, flags, mark = grid.begin_search()
+    # Entries are (f, -g, cell): ties on f go to the cell nearer the end
+    open_set = [(0, 0, start)]
+    g_score[start] = 0
+    came_from[start] = -1
+    flags[start] = mark
+
+    while open_set:
+        current = heapq.heappop(open_set)[2]
+        if flags[current] != mark:  # Stale entry, already expanded with a better score
+            if trace is not None:
+                trace.stale(current)
+            continue
+        flags[current] = mark | VISITED
+
+        if current == end:
+            return expand_jumps(grid, reconstruct_path(came_from, end))
+
+        generated = 0  # Jump points found, the successors of JPS
+        for dr, dc in directions(current, came_from[current]):
+            if dr and dc:
+                jump_point = jump_diagonal(current, dr, dc)
+            elif dr and not diagonal:
+                jump_point = jump_vertical(current, dr)
+            else:
+                jump_point = jump_straight(current, dr, dc)
+            if jump_point == -1:
+                continue
+            generated += 1
+            if flags[jump_point] < mark:  # First touch this query
+                flags[jump_point] = mark
+                g_score[jump_point] = INF
+            elif flags[jump_point] & VISITED:
+                continue
+
+            distance = manhattan(grid, current, jump_point)
+            if dr and dc:
+                temp_g_score = g_score[current] + DIAGONAL_COST * distance // 2
+            else:
+                temp_g_score = g_score[current] + step_cost * distance
+            if temp_g_score < g_score[jump_point]:
+                came_from[jump_point] = current
+                g_score[jump_point] = temp_g_score
+                f_score = temp_g_score + heuristic(grid, jump_point, end)
+                heapq.heappush(open_set, (f_score, -temp_g_score, jump_point))
+                if trace is not None:
+                    trace.open(jump_point)
+
+        if trace is not None and current != start:
+            trace.close(current, generated)
+            yield
+
+    return None
+
+
+def expand_jumps(grid, jump_points):
+    # Fill in the straight or diagonal runs between consecutive jump points
+    path = jump_points[:1]
+    for a, b in zip(jump_points, jump_points[1:]):
+        (r1, c1), (r2, c2) = divmod(a, grid.cols), divmod(b, grid.cols)
+        dr = (r2 > r1) - (r2 < r1)
+        dc = (c2 > c1) - (c2 < c1)
+        step = dr * grid.cols + dc
+        cell = a
+        while cell != b:
+            cell += step
+            path.append(cell)
+    return path
+
+
+@stepwise
+def dijkstra(grid, start, end, trace=None):
+    if unreachable(grid, start, end):
+        return None
+    g_score, came_from, flags, mark = grid.begin_search()
+    # Same bucket ring as a_star; pushes are at most one step above the key
+    size = grid.max_step_cost() + 1
+    buckets = [[] for _ in range(size)]
+    key = 0
+    buckets[0].append(start)
+    pending = 1
+    g_score[start] = 0
+    came_from[start] = -1
+    flags[start] = mark
+
+    while pending:
+        bucket = buckets[key % size]
+        while not bucket:
+            key += 1
+            bucket = buckets[key % size]
+        current = bucket.pop()
+        pending -= 1
+        if flags[current] != mark:  # Stale entry, already expanded with a better score
+            if trace is not None:
+                trace.stale(current)
+            continue
+        flags[current] = mark | VISITED  # VISITED marks the closed set here
+
+        if current == end:
+            return reconstruct_path(came_from, end)
+
+        g = g_score[current]
+        for neighbor, step in grid.neighbor_costs(current):
+            if flags[neighbor] < mark:  # First touch this query
+                flags[neighbor] = mark
+                g_score[neighbor] = INF
+            temp_g_score = g + step
+            if temp_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = temp_g_score
+                buckets[temp_g_score % size].append(neighbor)
+                pending += 1
+                if trace is not None:
+                    trace.open(neighbor)
+
+        if trace is not None and current != start:
+            trace.close(current, len(grid.neighbors(current)))
+            yield
+
+    return None
+
+
+@stepwise
+def bfs(grid, start, end, trace=None):
+    if unreachable(grid, start, end):
+        return None
+    _, came_from, flags, mark = grid.begin_search()
+    queue = deque([start])
+    came_from[start] = -1
+    flags[start] = mark | VISITED
+
+    while queue:
+        current = queue.popleft()
+
+        if current == end:
+            return reconstruct_path(came_from, end)
+
+        successors = grid.neighbors(current)
+
+        for neighbor in successors:
+            if flags[neighbor] < mark:
+                queue.append(neighbor)
+                flags[neighbor] = mark | VISITED
+                came_from[neighbor] = current
+                if trace is not None:
+                    trace.open(neighbor)
+
+        if trace is not None and current != start:
+            trace.close(current, len(successors))
+            yield
+
+    return None
+
+
+@stepwise
+def dfs(grid, start, end, trace=None):
+    if unreachable(grid, start, end):
+        return None
+    _, came_from, flags, mark = grid.begin_search()
+    stack = [start]
+    came_from[start] = -1
+
+    while stack:
+        current = stack.pop()
+
+        if current == end:
+            return reconstruct_path(came_from, end)
+
+        if flags[current] >= mark:  # Stale entry, expanded already from a later push
+            if trace is not None:
+                trace.stale(current)
+            continue
+        flags[current] = mark | VISITED
+
+        successors = grid.neighbors(current)
+
+        for neighbor in successors:
+            if flags[neighbor] < mark:
+                stack.append(neighbor)
+                came_from[neighbor] = current
+                if trace is not None:
+                    trace.open(neighbor)
+
+        if trace is not None and current != start:
+            trace.close(current, len(successors))
+            yield
+
+    return None
+
+
+@stepwise
+def greedy_best_first_search(grid, start, end, trace=None):
+    if unreachable(grid, start, end):
+        return None
+    _, came_from, flags, mark = grid.begin_search()
+    count = 0
+    open_set = [(0, count, start)]
+    came_from[start] = -1
+    flags[start] = mark | VISITED
+
+    while open_set:
+        current = heapq.heappop(open_set)[2]
+
+        if current == end:
+            return reconstruct_path(came_from, end)
+
+        successors = grid.neighbors(current)
+
+        for neighbor in successors:
+            if flags[neighbor] < mark:
+                came_from[neighbor] = current
+                count += 1
+                heapq.heappush(open_set, (heuristic(grid, neighbor, end), count, neighbor))
+                flags[neighbor] = mark | VISITED
+                if trace is not None:
+                    trace.open(neighbor)
+
+        if trace is not None and current != start:
+            trace.close(current, len(successors))
+            yield
+
+    return None
+
+
+@stepwise
+def bidirectional_search(grid, start, end, trace=None):
+    if unreachable(grid, start, end):
+        return None
+    if start == end:
+        return [start]
+
+    _, came_from_start, flags, mark = grid.begin_search()
+    _, came_from_end = grid.begin_reverse_search()
+    queue_start = deque([start])
+    queue_end = deque([end])
+    came_from_start[start] = -1
+    came_from_end[end] = -1
+    flags[start] = mark | VISITED
+    flags[end] = mark | VISITED_REVERSE
+
+    while queue_start and queue_end:
+        # Expand from start
+        current_start = queue_start.popleft()
+        successors = grid.neighbors(current_start)
+        for neighbor in successors:
+            seen = max(flags[neighbor], mark)  # Bits of an earlier query don't count
+            if not seen & VISITED:
+                queue_start.append(neighbor)
+                flags[neighbor] = seen | VISITED
+                came_from_start[neighbor] = current_start
+                if trace is not None:
+                    trace.open(neighbor)
+                if seen & VISITED_REVERSE:  # Intersection found
+                    return reconstruct_bidirectional_path(came_from_start, came_from_end, neighbor)
+
+        if trace is not None and current_start != start:
+            trace.close(current_start, len(successors))
+            yield
+
+        # Expand from end
+        current_end = queue_end.popleft()
+        successors = grid.neighbors(current_end)
+        for neighbor in successors:
+            seen = max(flags[neighbor], mark)
+            if not seen & VISITED_REVERSE:
+                queue_end.append(neighbor)
+                flags[neighbor] = seen | VISITED_REVERSE
+                came_from_end[neighbor] = current_end
+                if trace is not None:
+                    trace.open(neighbor)
+                if seen & VISITED:  # Intersection found
+                    return reconstruct_bidirectional_path(came_from_start, came_from_end, neighbor)
+
+        if trace is not None and current_end != end:
+            trace.close(current_end, len(successors))
+            yield
+
+    return None
+
+
+@stepwise
+def bidirectional_a_star(grid, start, end, trace=None, estimate=heuristic):
+    """A* from both ends at once, returning the cheapest path.
+
+    Both searches use the average of the two heuristics as their potential,
+    so one key order serves both: the forward key is
+    ``2 * g + estimate(cell, end) - estimate(start, cell)`` and the backward
+    key the same with the estimates swapped (doubled to stay integral). Each
+    round expands the side with fewer open entries. ``best`` is the cheapest
+    start-to-end join seen so far, and once the two smallest keys add up to
+    twice that, no unexpanded cell can lead to a cheaper one. estimate must
+    be consistent and symmetric, like heuristic; zero_estimate turns this
+    into bidirectional Dijkstra.
+    """
+    if unreachable(grid, start, end):
+        return None
+    if start == end:
+        return [start]
+
+    def potential(cell):
+        return estimate(grid, cell, end) - estimate(grid, start, cell)
+
+    g_start, came_from_start, flags, mark = grid.begin_search()
+    g_end, came_from_end = grid.begin_reverse_search()
+
+    def touch(cell):
+        # Reset both halves of a cell the first time this query reaches it
+        if flags[cell] < mark:
+            flags[cell] = mark
+            g_start[cell] = g_end[cell] = INF
+
+    open_start = [(potential(start), start)]
+    open_end = [(-potential(end), end)]
+    touch(start)
+    touch(end)
+    g_start[start] = 0
+    g_end[end] = 0
+    came_from_start[start] = -1
+    came_from_end[end] = -1
+    best = INF
+    meet = -1
+
+    while open_start and open_end:
+        if open_start[0][0] + open_end[0][0] >= 2 * best:
+            break
+
+        if len(open_start) <= len(open_end):
+            # Expand from start
+            current = heapq.heappop(open_start)[1]
+            if flags[current] & VISITED:  # Stale entry
+                if trace is not None:
+                    trace.stale(current)
+                continue
+            flags[current] |= VISITED
+            g = g_start[current]
+            for neighbor, step in grid.neighbor_costs(current):
+                touch(neighbor)
+                temp_g_score = g + step
+                if temp_g_score < g_start[neighbor]:
+                    came_from_start[neighbor] = current
+                    g_start[neighbor] = temp_g_score
+                    heapq.heappush(open_start, (2 * temp_g_score + potential(neighbor), neighbor))
+                    if trace is not None:
+                        trace.open(neighbor)
+                    if temp_g_score + g_end[neighbor] < best:  # g_end is INF if unseen
+                        best = temp_g_score + g_end[neighbor]
+                        meet = neighbor
+            if trace is not None and current != start:
+                trace.close(current, len(grid.neighbors(current)))
+                yield
+        else:
+            # Expand from end, along steps into current
+            current = heapq.heappop(open_end)[1]
+            if flags[current] & VISITED_REVERSE:  # Stale entry
+                if trace is not None:
+                    trace.stale(current)
+                continue
+            flags[current] |= VISITED_REVERSE
+            g = g_end[current]
+            for neighbor, step in grid.reverse_neighbor_costs(current):
+                touch(neighbor)
+                temp_g_score = g + step
+                if temp_g_score < g_end[neighbor]:
+                    came_from_end[neighbor] = current
+                    g_end[neighbor] = temp_g_score
+                    heapq.heappush(open_end, (2 * temp_g_score - potential(neighbor), neighbor))
+                    if trace is not None:
+                        trace.open(neighbor)
+                    if temp_g_score + g_start[neighbor] < best:
+                        best = temp_g_score + g_start[neighbor]
+                        meet = neighbor
+            if trace is not None and current != end:
+                trace.close(current, len(grid.neighbors(current)))
+                yield
+
+    if meet == -1:
+        return None
+    return reconstruct_bidirectional_path(came_from_start, came_from_end, meet)
+
+
+def zero_estimate(grid, a, b):
+    return 0
+
+
+@stepwise
+def bidirectional_dijkstra(grid, start, end, trace=None):
+    return (yield from bidirectional_a_star.steps(grid, start, end, trace, zero_estimate))
+
+
+@stepwise
+def ida_star(grid, start, end, trace=None, table_size=TABLE_SIZE, node_limit=IDA_NODE_LIMIT):
+    """Iterative-deepening A* with an explicit stack and a transposition table.
+
+    Each iteration is a depth-first search that prunes at an f-cost
+    threshold, so memory is the current path plus a fixed-size table. The
+    table is direct-mapped by cell and keeps the cheapest g seen so far, over
+    all iterations, which cuts the grid's many transpositions; a colliding
+    cell simply evicts the previous entry. Rather than raising the threshold to
+    the smallest pruned f, which on grids means one iteration per unit of
+    cost, it is raised far enough to admit about twice as many nodes as the
+    last iteration. The iteration that finds a path then keeps searching
+    below that path's cost, so the result is still optimal.
+
+    Large open maps still re-expand far too much, so after node_limit
+    expansions it gives up and raises NodeLimitReached, keeping None for
+    goals that are really out of reach; node_limit=None searches to the end.
+    """
+    if unreachable(grid, start, end):
+        return None
+    if start == end:
+        return [start]
+    _, _, flags, mark = grid.begin_search()  # mark | VISITED marks the current path here
+    table_cells = np.full(table_size, -1, dtype=np.int32)
+    table_costs = np.empty(table_size, dtype=np.int32)
+    table_rounds = np.empty(table_size, dtype=np.int32)
+    cells, costs, rounds = memoryview(table_cells), memoryview(table_costs), memoryview(table_rounds)
+    threshold = heuristic(grid, start, end)
+    iteration = 0
+    previous = 0  # Nodes expanded by the last iteration
+    budget = INF if node_limit is None else node_limit
+    jump = 1
+
+    while True:
+        iteration += 1
+        exceeded = {}  # Pruned f -> how many times
+        expanded = 0
+        best = None
+        bound = threshold
+        path = [start]
+        g_path = [0]
+        stack = [iter(grid.neighbor_costs(start))]
+        flags[start] = mark | VISITED
+
+        while stack:
+            for neighbor, step in stack[-1]:
+                if flags[neighbor] >= mark:
+                    continue
+                g = g_path[-1] + step
+                f = g + heuristic(grid, neighbor, end)
+                if f > bound:
+                    exceeded[f] = exceeded.get(f, 0) + 1
+                    continue
+                slot = neighbor % table_size
+                if cells[slot] == neighbor and (g > costs[slot] or
+                                                (g == costs[slot] and rounds[slot] == iteration)):
+                    continue  # Reached more cheaply before, or already searched from here this round
+                cells[slot] = neighbor
+                costs[slot] = g
+                rounds[slot] = iteration
+                if neighbor == end:
+                    best = path + [end]
+                    bound = g - 1  # Only strictly cheaper paths from now on
+                    continue
+                flags[neighbor] = mark | VISITED
+                path.append(neighbor)
+                g_path.append(g)
+                stack.append(iter(grid.neighbor_costs(neighbor)))
+                expanded += 1
+                if expanded > budget:
+                    raise NodeLimitReached(f"ida_star gave up after {node_limit} expansions")
+                if trace is not None:
+                    trace.open(neighbor)
+                break
+            else:
+                current = path.pop()
+                g_path.pop()
+                stack.pop()
+                flags[current] = 0
+                if trace is not None and current != start:
+                    # Backtracking means every neighbor was generated
+                    trace.close(current, len(grid.neighbors(current)))
+                    yield
+
+        if best is not None:
+            return best
+        if not exceeded:
+            return None  # Nothing was pruned, so everything reachable was searched
+
+        # Raise the threshold to admit about twice as many nodes as this
+        # iteration. The pruned f histogram only sees the next layer, so when
+        # the frontier is too thin for that, as in corridors and mazes, a
+        # jump that doubles every time the work failed to double takes over.
+        total = 0
+        for f in sorted(exceeded):
+            total += exceeded[f]
+            next_threshold = f
+            if total >= expanded:
+                break
+        if expanded < 2 * previous:
+            jump *= 2
+            next_threshold = max(next_threshold, threshold + jump)
+        previous = expanded
+        budget -= expanded
+        threshold = next_threshold
+
+
+# Button label -> search function, in the order the visualizer shows them
+ALGORITHMS = {
+    "A*": a_star,
+    "Dijkstra": dijkstra,
+    "BFS": bfs,
+    "DFS": dfs,
+    "Greedy": greedy_best_first_search,
+    "Bi-Search": bidirectional_search,
+    "Bi-A*": bidirectional_a_star,
+    "Bi-Dijkstra": bidirectional_dijkstra,
+    "IDA*": ida_star,
+    "JPS": jump_point_search,
+}
@@ -0,0 +1,167 @@
+"""D* Lite: incremental replanning on a pathfinding_core.Grid.
+
+The planner searches backwards from end and keeps its g/rhs arrays and
+priority queue between calls. After barriers change, ``update_cells`` only
+re-queues the changed cells and their neighbors, and the next ``plan``
+repairs the part of the shortest-path tree they affect instead of starting
+over. The start may move between plans without losing any work. Edges all
+cost 1, so the grid must be 4-connected and free of terrain costs.
+"""
+import heapq
+
+import numpy as np
+
+from pathfinding_core import INF, finish, heuristic, unreachable
+
+
+class DStarLite:
+    def __init__(self, grid, start, end):
+        if grid.diagonal or grid.cost is not None:
+            raise ValueError("D* Lite needs a 4-connected grid without terrain costs")
+        self.grid = grid
+        self.start = start
+        self.end = end
+        self.last = start
+        self.km = 0
+        self.g_array = np.full(grid.size, INF, dtype=np.int32)
+        self.rhs_array = np.full(grid.size, INF, dtype=np.int32)
+        self.g = memoryview(self.g_array)
+        self.rhs = memoryview(self.rhs_array)
+        self.open_set = []
+        self.queued = {}  # cell -> key of its live heap entry
+        self.trace = None
+
+        self.rhs[end] = 0
+        self.push(end, (heuristic(grid, start, end), 0))
+
+    def key(self, cell):
+        best = min(self.g[cell], self.rhs[cell])
+        return (best + heuristic(self.grid, self.start, cell) + self.km, best)
+
+    def push(self, cell, key):
+        self.queued[cell] = key
+        heapq.heappush(self.open_set, (key, cell))
+        if self.trace is not None:
+            self.trace.open(cell)
+
+    def top_key(self):
+        # Drop entries that were superseded or removed since they were pushed
+        open_set = self.open_set
+        while open_set and self.queued.get(open_set[0][1]) != open_set[0][0]:
+            cell = heapq.heappop(open_set)[1]
+            if self.trace is not None:
+                self.trace.stale(cell)
+        return open_set[0][0] if open_set else (INF, INF)
+
+    def update_vertex(self, cell):
+        if self.g[cell] != self.rhs[cell]:
+            self.push(cell, self.key(cell))
+        else:
+            self.queued.pop(cell, None)
+
+    def best_rhs(self, cell):
+        # One-step lookahead: cheapest way to reach end through a neighbor
+        if self.grid.is_barrier(cell):
+            return INF
+        g = self.g
+        best = INF
+        for neighbor in self.grid.neighbors(cell):
+            if g[neighbor] < best:
+                best = g[neighbor]
+        return best + 1 if best != INF else INF
+
+    def compute_shortest_path(self):
+        # A generator yielding after every traced expansion. Each iteration
+        # leaves every inconsistent cell queued, so it may be abandoned
+        # between yields and the next plan carries on from there
+        g, rhs = self.g, self.rhs
+        grid, start, end = self.grid, self.start, self.end
+        while True:
+            top_key = self.top_key()
+            if not self.open_set:
+                break  # Everything reachable is settled; start may be cut off
+            if not (top_key < self.key(start) or rhs[start] != g[start]):
+                break
+            key_old, current = heapq.heappop(self.open_set)
+            key_new = self.key(current)
+            if key_old < key_new:
+                self.push(current, key_new)
+                continue
+
+            del self.queued[current]
+            if g[current] > rhs[current]:
+                g[current] = rhs[current]
+                successors = grid.neighbors(current)
+                for neighbor in successors:
+                    if neighbor != end and g[current] + 1 < rhs[neighbor]:
+                        rhs[neighbor] = g[current] + 1
+                        self.update_vertex(neighbor)
+            else:
+                g_old = g[current]
+                g[current] = INF
+                successors = grid.neighbors(current)
+                for cell in successors + [current]:
+                    if cell != end and (cell == current or rhs[cell] == g_old + 1):
+                        rhs[cell] = self.best_rhs(cell)
+                    self.update_vertex(cell)
+
+            if self.trace is not None and current != start and current != end:
+                self.trace.close(current, len(successors))
+                yield
+
+    def set_start(self, start):
+        # Moving the start only shifts the heap keys, tracked through km
+        self.km += heuristic(self.grid, self.last, start)
+        self.last = start
+        self.start = start
+
+    def update_cells(self, cells):
+        # Barriers were toggled on these cells; re-evaluate them and their
+        # neighbors, blocked or not, since every edge touching them changed
+        grid, rhs, end = self.grid, self.rhs, self.end
+        cols = grid.cols
+        for cell in cells:
+            row, col = divmod(cell, cols)
+            around = [cell]
+            if row > 0:
+                around.append(cell - cols)
+            if row < grid.rows - 1:
+                around.append(cell + cols)
+            if col > 0:
+                around.append(cell - 1)
+            if col < cols - 1:
+                around.append(cell + 1)
+            for other in around:
+                if other != end:
+                    rhs[other] = self.best_rhs(other)
+                self.update_vertex(other)
+
+    def plan(self, trace=None):
+        return finish(self.plan_steps(trace))
+
+    def plan_steps(self, trace=None):
+        # plan as a generator yielding after every traced expansion
+        if unreachable(self.grid, self.start, self.end):
+            return None  # The queue is left as is for the next plan
+        self.trace = trace
+        try:
+            yield from self.compute_shortest_path()
+        finally:
+            self.trace = None  # Also when the plan is abandoned
+        return self.path()
+
+    def path(self):
+        g = self.g
+        current = self.start
+        if g[current] == INF:
+            return None
+        path = [current]
+        while current != self.end:
+            current = min(self.grid.neighbors(current), key=g.__getitem__)
+            path.append(current)
+        return path
+
+
+def d_star_lite(grid, start, end, trace=None):
+    # One-shot planning, for callers that do not keep the planner around
+    return DStarLite(grid, start, end).plan(trace)
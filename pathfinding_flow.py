@@ -0,0 +1,177 @@
+"""Flow fields: one search from a goal that every agent heading there can follow.
+
+Instead of an A* query per agent, a single Dijkstra runs backwards from the
+goal and leaves the cost to reach it from every cell in ``distance``. Each
+cell also records the neighbor its cheapest path steps to, as a flat index in
+``next_cell`` and as an index into MOVES in ``direction``, so an agent moves
+with one array lookup per step, and a whole crowd with one fancy index:
+``positions = field.next_cell[positions]``.
+
+After barriers change, ``update_cells`` repairs the field in place. Cells
+whose route ran through a closed cell lose their distance and are refilled
+from the unaffected cells around them, and cells next to an opened cell
+propagate any shortcut it creates; the rest of the field is left untouched.
+"""
+import heapq
+
+import numpy as np
+
+from pathfinding_core import INF
+from pathfinding_components import RING
+
+# (row, col) offset of each direction code, straight moves first
+MOVES = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+NO_MOVE = -1
+
+
+class FlowField:
+    def __init__(self, grid, goal):
+        self.grid = grid
+        self.goal = goal
+        self.distance = np.empty(grid.size, dtype=np.int32)  # INF where the goal is out of reach
+        self.next_cell = np.empty(grid.size, dtype=np.int32)  # -1 at the goal and unreached cells
+        self.direction = np.empty(grid.size, dtype=np.int8)  # MOVES index, NO_MOVE like next_cell
+        self._distance = memoryview(self.distance)
+        self._next_cell = memoryview(self.next_cell)
+        # Direction code by (row offset + 1) * 3 + (col offset + 1)
+        self.codes = np.full(9, NO_MOVE, dtype=np.int8)
+        for code, (dr, dc) in enumerate(MOVES):
+            self.codes[(dr + 1) * 3 + dc + 1] = code
+        self.build()
+
+    def build(self):
+        # Backward Dijkstra over the whole reachable area, with the same
+        # bucket ring as pathfinding_core.dijkstra
+        grid, goal = self.grid, self.goal
+        self.distance.fill(INF)
+        self.next_cell.fill(-1)
+        if grid.is_barrier(goal):
+            self.update_directions()
+            return
+        distance, next_cell = self._distance, self._next_cell
+        size = grid.max_step_cost() + 1
+        buckets = [[] for _ in range(size)]
+        settled = bytearray(grid.size)
+        key = 0
+        buckets[0].append(goal)
+        pending = 1
+        distance[goal] = 0
+
+        while pending:
+            bucket = buckets[key % size]
+            while not bucket:
+                key += 1
+                bucket = buckets[key % size]
+            current = bucket.pop()
+            pending -= 1
+            if settled[current]:
+                continue
+            settled[current] = 1
+            d = distance[current]
+            for neighbor, step in grid.reverse_neighbor_costs(current):
+                if d + step < distance[neighbor]:
+                    distance[neighbor] = d + step
+                    next_cell[neighbor] = current
+                    buckets[(d + step) % size].append(neighbor)
+                    pending += 1
+
+        self.update_directions()
+
+    def update_directions(self):
+        # Derive the MOVES code of every cell from next_cell in one pass
+        cols = self.grid.cols
+        cells = np.arange(self.grid.size)
+        heading = self.next_cell >= 0
+        rows, columns = np.divmod(cells, cols)
+        next_rows, next_columns = np.divmod(self.next_cell, cols)
+        key = (next_rows - rows + 1) * 3 + next_columns - columns + 1
+        self.direction[:] = np.where(heading, self.codes[np.where(heading, key, 4)], NO_MOVE)
+
+    def update_cells(self, cells):
+        """Repair the field after the barriers at ``cells`` changed."""
+        grid = self.grid
+        distance, next_cell = self._distance, self._next_cell
+        if grid.is_barrier(self.goal) or distance[self.goal] != 0:
+            self.build()  # The goal itself was closed or reopened
+            return
+        rows, cols = grid.rows, grid.cols
+
+        # Every move a change can add or remove joins two cells of the
+        # changed cell's 3x3 block, so only those cells need checking
+        around = set()
+        for cell in cells:
+            row, col = divmod(cell, cols)
+            around.add(cell)
+            for dr, dc in RING:
+                if 0 <= row + dr < rows and 0 <= col + dc < cols:
+                    around.add(cell + dr * cols + dc)
+
+        # Cells that are now barriers, or whose step is no longer allowed,
+        # cut off everything upstream of them in the tree of next_cell
+        cut = [cell for cell in around
+               if (grid.is_barrier(cell) and distance[cell] != INF) or
+               (next_cell[cell] != -1 and next_cell[cell] not in grid.neighbors(cell))]
+        lost = []
+        if cut:
+            lost = np.flatnonzero(self.upstream(cut))
+            self.distance[lost] = INF
+            self.next_cell[lost] = -1
+            lost = lost.tolist()
+
+        # Refill from the cheapest neighbor that kept its distance, then let
+        # Dijkstra carry every decrease outwards
+        open_set = []
+        for cell in set(lost) | around:
+            if grid.is_barrier(cell):
+                continue
+            for neighbor, step in grid.neighbor_costs(cell):
+                if distance[neighbor] != INF and distance[neighbor] + step < distance[cell]:
+                    distance[cell] = distance[neighbor] + step
+                    next_cell[cell] = neighbor
+            if distance[cell] != INF:
+                open_set.append((distance[cell], cell))
+        heapq.heapify(open_set)
+
+        while open_set:
+            d, current = heapq.heappop(open_set)
+            if d > distance[current]:
+                continue  # Stale entry
+            for neighbor, step in grid.reverse_neighbor_costs(current):
+                if d + step < distance[neighbor]:
+                    distance[neighbor] = d + step
+                    next_cell[neighbor] = current
+                    heapq.heappush(open_set, (d + step, neighbor))
+
+        self.update_directions()
+
+    def upstream(self, cells):
+        # Mask of cells whose chain of next_cell reaches one of cells,
+        # including them. Pointer jumping: after k rounds every cell looks
+        # 2**k steps ahead, so the deepest tree needs only log2(depth) passes
+        size = self.grid.size
+        ahead = np.append(self.next_cell, size)
+        ahead[ahead == -1] = size  # Chains end at a sentinel past the last cell
+        marked = np.zeros(size + 1, dtype=bool)
+        marked[cells] = True
+        while True:
+            marked |= marked[ahead]
+            if (ahead[ahead] == ahead).all():
+                break
+            ahead = ahead[ahead]
+        return marked[:size]
+
+    def path(self, start):
+        # Cells an agent at start walks through to the goal, None if it can't
+        if self._distance[start] == INF:
+            return None
+        path = [start]
+        next_cell = self._next_cell
+        while path[-1] != self.goal:
+            path.append(next_cell[path[-1]])
+        return path
+
+
+def flow_field(grid, goal):
+    """Distance to goal and direction code for every cell of grid."""
+    field = FlowField(grid, goal)
+    return field.distance, field.direction
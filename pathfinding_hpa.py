@@ -0,0 +1,326 @@
+"""Hierarchical pathfinding (HPA*) on a pathfinding_core.Grid.
+
+The grid is cut into square clusters. Where two neighboring clusters share
+free border cells, transition cells are placed on both sides, and the
+distances between the transitions of each cluster are computed once with a
+vectorized BFS that never leaves the cluster. Queries run A* over that small
+abstract graph and then refine each abstract edge into grid cells with a
+cluster-local BFS; segments between two transitions are cached per cluster,
+while the start and end are joined through BFS trees of that query. Paths
+are near-optimal, not guaranteed shortest: they can be longer than what
+a_star returns, mostly on small or cluttered clusters.
+
+Barrier edits only mark clusters dirty; the next query recomputes the
+entrances and distances of those clusters alone. Distances are BFS step
+counts, so the grid must be 4-connected and free of terrain costs.
+"""
+import heapq
+from collections import deque
+
+import numpy as np
+
+from pathfinding_core import finish, heuristic, unreachable
+
+# Border segments at least this long get a transition at each end
+LONG_ENTRANCE = 6
+
+
+def block_distances(free, sources):
+    # Pairwise BFS distances between sources inside one cluster, with -1 for
+    # unreachable pairs. free is the cluster's (h, w) boolean block. Up to 64
+    # sources are searched at once, one bit each in a uint64 per cell, so a
+    # BFS level is a few whole-block shifts no matter how many sources there are.
+    count = len(sources)
+    rows, cols = (np.array(axis) for axis in zip(*sources))
+    passable = np.where(free, ~np.uint64(0), np.uint64(0))
+    distance = np.full((count, count), -1, dtype=np.int32)
+
+    for first in range(0, count, 64):
+        batch = distance[first:first + 64]
+        shifts = np.arange(len(batch), dtype=np.uint64)
+        frontier = np.zeros(free.shape, dtype=np.uint64)
+        frontier[rows[first:first + 64], cols[first:first + 64]] = np.uint64(1) << shifts
+        reached = frontier.copy()
+        level = 0
+        while True:
+            hits = (frontier[rows, cols][None, :] >> shifts[:, None]) & np.uint64(1)
+            batch[hits.astype(bool)] = level
+            level += 1
+            grown = np.zeros_like(frontier)
+            grown[1:, :] |= frontier[:-1, :]
+            grown[:-1, :] |= frontier[1:, :]
+            grown[:, 1:] |= frontier[:, :-1]
+            grown[:, :-1] |= frontier[:, 1:]
+            frontier = grown & passable & ~reached
+            if not frontier.any():
+                break
+            reached |= frontier
+
+    return distance
+
+
+class HierarchicalGrid:
+    def __init__(self, grid, cluster_size=16):
+        if grid.diagonal or grid.cost is not None:
+            raise ValueError("HPA* needs a 4-connected grid without terrain costs")
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        self.entrances = {}  # (cluster, cluster) -> [(cell, cell), ...]
+        self.inter = {}      # transition cell -> partner cells across borders
+        self.intra = {}      # cluster -> {transition cell: [(cell, distance)]}
+        self.edges = {}      # transition cell -> abstract edges the search follows, intra then inter
+        self.segments = {}   # cluster -> {(transition, transition): refined cells}
+        self.dirty_borders = set()
+        self.dirty_clusters = set()
+
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            for other in self.adjacent_clusters(cluster):
+                if cluster < other:
+                    self.dirty_borders.add((cluster, other))
+            self.dirty_clusters.add(cluster)
+        self.refresh()
+
+    def cluster_of(self, cell):
+        row, col = divmod(cell, self.grid.cols)
+        return (row // self.cluster_size) * self.cluster_cols + col // self.cluster_size
+
+    def bounds(self, cluster):
+        # (first row, first col, last row + 1, last col + 1)
+        size = self.cluster_size
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        row, col = cluster_row * size, cluster_col * size
+        return row, col, min(row + size, self.grid.rows), min(col + size, self.grid.cols)
+
+    def adjacent_clusters(self, cluster):
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        result = []
+        if cluster_row > 0:
+            result.append(cluster - self.cluster_cols)
+        if cluster_row < self.cluster_rows - 1:
+            result.append(cluster + self.cluster_cols)
+        if cluster_col > 0:
+            result.append(cluster - 1)
+        if cluster_col < self.cluster_cols - 1:
+            result.append(cluster + 1)
+        return result
+
+    def local_bfs(self, source, cluster, target=None):
+        # BFS from source that stays inside cluster; returns distances and
+        # parents, stopping early once target is reached
+        row0, col0, row1, col1 = self.bounds(cluster)
+        cols = self.grid.cols
+        neighbors = self.grid.neighbors
+        distance = {source: 0}
+        parent = {}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                break
+            for neighbor in neighbors(current):
+                row, col = divmod(neighbor, cols)
+                if row0 <= row < row1 and col0 <= col < col1 and neighbor not in distance:
+                    distance[neighbor] = distance[current] + 1
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+        return distance, parent
+
+    def build_entrances(self, a, b):
+        # Pairs of facing free cells along the border between clusters a < b
+        grid = self.grid
+        row0, col0, row1, col1 = self.bounds(a)
+        if b // self.cluster_cols == a // self.cluster_cols:  # b is to the right
+            pairs = [(grid.index(row, col1 - 1), grid.index(row, col1)) for row in range(row0, row1)]
+        else:  # b is below
+            pairs = [(grid.index(row1 - 1, col), grid.index(row1, col)) for col in range(col0, col1)]
+
+        entrances = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and not grid.is_barrier(pair[0]) and not grid.is_barrier(pair[1]):
+                run.append(pair)
+                continue
+            if len(run) >= LONG_ENTRANCE:
+                entrances += [run[0], run[-1]]
+            elif run:
+                entrances.append(run[len(run) // 2])
+            run = []
+        return entrances
+
+    def update_cells(self, cells):
+        # Mark the clusters, and borders, whose abstract graph may have changed
+        grid = self.grid
+        for cell in cells:
+            cluster = self.cluster_of(cell)
+            self.dirty_clusters.add(cluster)
+            row0, col0, row1, col1 = self.bounds(cluster)
+            row, col = grid.pos(cell)
+            facing = []
+            if row == row0 and row > 0:
+                facing.append(cluster - self.cluster_cols)
+            if row == row1 - 1 and row < grid.rows - 1:
+                facing.append(cluster + self.cluster_cols)
+            if col == col0 and col > 0:
+                facing.append(cluster - 1)
+            if col == col1 - 1 and col < grid.cols - 1:
+                facing.append(cluster + 1)
+            for other in facing:
+                self.dirty_borders.add((min(cluster, other), max(cluster, other)))
+                self.dirty_clusters.add(other)
+
+    def refresh(self):
+        if not self.dirty_borders and not self.dirty_clusters:
+            return
+
+        for border in self.dirty_borders:
+            for a, b in self.entrances.get(border, ()):
+                self.inter[a].remove(b)
+                self.inter[b].remove(a)
+            self.entrances[border] = self.build_entrances(*border)
+            for a, b in self.entrances[border]:
+                self.inter.setdefault(a, []).append(b)
+                self.inter.setdefault(b, []).append(a)
+        self.dirty_borders.clear()
+
+        grid = self.grid
+        free = (grid.blocked == 0).reshape(grid.rows, grid.cols)
+        for cluster in self.dirty_clusters:
+            transitions = set()
+            for other in self.adjacent_clusters(cluster):
+                for pair in self.entrances[(min(cluster, other), max(cluster, other))]:
+                    transitions.add(pair[0] if self.cluster_of(pair[0]) == cluster else pair[1])
+            transitions = sorted(transitions)
+            for cell in self.intra.get(cluster, ()):
+                del self.edges[cell]
+            edges = {cell: [] for cell in transitions}
+            search = {cell: [] for cell in transitions}
+            if len(transitions) > 1:
+                row0, col0, row1, col1 = self.bounds(cluster)
+                local = [(row - row0, col - col0) for row, col in map(grid.pos, transitions)]
+                distance = block_distances(free[row0:row1, col0:col1], local)
+                # The search skips an edge a -> c when some other transition b
+                # lies on a shortest a -> c path; a -> b -> c costs the same
+                through = np.where(distance >= 0, distance, np.inf)
+                np.fill_diagonal(through, np.inf)
+                direct = (through[:, :, None] + through[None, :, :]).min(axis=1) > through
+                distance = distance.tolist()
+                direct = direct.tolist()
+                for i, cell in enumerate(transitions):
+                    for j, other in enumerate(transitions):
+                        if i != j and distance[i][j] >= 0:
+                            edges[cell].append((other, distance[i][j]))
+                            if direct[i][j]:
+                                search[cell].append((other, distance[i][j]))
+            self.intra[cluster] = edges
+            for cell in transitions:
+                self.edges[cell] = search[cell] + [(other, 1) for other in self.inter[cell]]
+            self.segments[cluster] = {}
+        self.dirty_clusters.clear()
+
+    def refine(self, a, b):
+        # Grid cells after a up to b for one intra edge between transitions
+        cluster = self.cluster_of(a)
+        cache = self.segments[cluster]
+        if (a, b) not in cache:
+            _, parent = self.local_bfs(a, cluster, b)
+            segment = [b]
+            while segment[-1] != a:
+                segment.append(parent[segment[-1]])
+            segment.pop()
+            segment.reverse()
+            cache[(a, b)] = segment
+        return cache[(a, b)]
+
+    def find_path(self, start, end, trace=None):
+        return finish(self.find_path_steps(start, end, trace))
+
+    def find_path_steps(self, start, end, trace=None):
+        # find_path as a generator yielding after every traced expansion
+        grid = self.grid
+        if grid.is_barrier(start) or grid.is_barrier(end) or unreachable(grid, start, end):
+            return None
+        if start == end:
+            return [start]
+        self.refresh()
+
+        # Temporarily connect start and end to the transitions of their
+        # clusters. The BFS parents refine those edges for this query only,
+        # so the segment cache never grows with new start or end cells
+        start_cluster, end_cluster = self.cluster_of(start), self.cluster_of(end)
+        distance, start_parent = self.local_bfs(start, start_cluster)
+        start_edges = [(cell, distance[cell]) for cell in self.intra[start_cluster] if cell in distance]
+        if end in distance:
+            start_edges.append((end, distance[end]))
+        start_edges += [(cell, 1) for cell in self.inter.get(start, ())]
+        distance, end_parent = self.local_bfs(end, end_cluster)
+        to_end = {cell: distance[cell] for cell in self.intra[end_cluster] if cell in distance}
+
+        # Entries are (f, -g, cell): ties on f go to the larger g, the entry
+        # nearer the end. The heuristic is consistent, so an entry is stale
+        # exactly when its g is above the cell's best, and an expanded cell
+        # is never improved again. Manhattan distance is inlined.
+        cols = grid.cols
+        end_row, end_col = divmod(end, cols)
+        open_set = [(heuristic(grid, start, end), 0, start)]
+        g_score = {start: 0}
+        came_from = {}
+        while open_set:
+            _, g, current = heapq.heappop(open_set)
+            g = -g
+            if g > g_score[current]:
+                if trace is not None:
+                    trace.stale(current)
+                continue
+
+            if current == end:
+                path = [start]
+                chain = [end]
+                while chain[-1] != start:
+                    chain.append(came_from[chain[-1]])
+                chain.reverse()
+                for a, b in zip(chain, chain[1:]):
+                    if b in self.inter.get(a, ()):
+                        path.append(b)
+                    elif a == start:
+                        segment = [b]
+                        while segment[-1] != start:
+                            segment.append(start_parent[segment[-1]])
+                        path += segment[-2::-1]
+                    elif b == end:
+                        path.append(end_parent[a])
+                        while path[-1] != end:
+                            path.append(end_parent[path[-1]])
+                    else:
+                        path += self.refine(a, b)
+                return path
+
+            if current == start:
+                edges = start_edges
+            else:
+                edges = self.edges[current]
+                if current in to_end:
+                    edges = edges + [(end, to_end[current])]
+
+            for neighbor, cost in edges:
+                temp_g_score = g + cost
+                if temp_g_score < g_score.get(neighbor, temp_g_score + 1):
+                    g_score[neighbor] = temp_g_score
+                    came_from[neighbor] = current
+                    row, col = divmod(neighbor, cols)
+                    heapq.heappush(open_set, (temp_g_score + abs(row - end_row) + abs(col - end_col),
+                                              -temp_g_score, neighbor))
+                    if trace is not None:
+                        trace.open(neighbor)
+
+            if trace is not None and current != start:
+                trace.close(current, len(edges))
+                yield
+
+        return None
+
+
+def hpa_star(grid, start, end, trace=None, cluster_size=16):
+    # One-shot query; keep a HierarchicalGrid around to reuse its cache
+    return HierarchicalGrid(grid, cluster_size).find_path(start, end, trace)
@@ -0,0 +1,108 @@
+"""Map and scenario loaders for pathfinding_core grids.
+
+Supported inputs:
+  * ``.map`` / ``.scen`` text files in the grid-benchmark format used by the
+    Moving AI pathfinding benchmarks,
+  * ``.grid`` binary grids, memory-mapped so huge maps load instantly and are
+    shared through the page cache,
+  * ``.npy`` arrays where nonzero cells are barriers.
+"""
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+import pathfinding_core as core
+
+# Characters of a .map file that can be walked on; everything else ("@", "O",
+# "T", "W", ...) is treated as a barrier
+PASSABLE = b".GS"
+
+# .grid layout: magic, rows and cols as little-endian uint32, then one uint8
+# per cell in row-major order, nonzero meaning barrier
+GRID_MAGIC = b"GRID"
+GRID_HEADER = struct.Struct("<4sII")
+
+Scenario = namedtuple("Scenario", "bucket map_name rows cols start end optimal")
+
+
+def load_map(path):
+    with open(path, "rb") as file:
+        lines = file.read().splitlines()
+    header = {}
+    for i, line in enumerate(lines):
+        if line.strip() == b"map":
+            body = lines[i + 1:]
+            break
+        key, _, value = line.decode().partition(" ")
+        header[key] = value.strip()
+    else:
+        raise ValueError(f"{path}: no 'map' line")
+
+    rows, cols = int(header["height"]), int(header["width"])
+    if len(body) < rows or any(len(line) < cols for line in body[:rows]):
+        raise ValueError(f"{path}: map body is smaller than {rows}x{cols}")
+    chars = np.frombuffer(b"".join(line[:cols] for line in body[:rows]), dtype=np.uint8)
+    blocked = (~np.isin(chars, np.frombuffer(PASSABLE, dtype=np.uint8))).astype(np.uint8)
+    return core.Grid(rows, cols, blocked)
+
+
+def load_scenarios(path):
+    # One Scenario per line; x is the column and y the row in this format
+    scenarios = []
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) < 9 or fields[0] == "version":
+                continue
+            bucket, map_name = int(fields[0]), fields[1]
+            cols, rows = int(fields[2]), int(fields[3])
+            start_x, start_y, end_x, end_y = map(int, fields[4:8])
+            scenarios.append(Scenario(bucket, map_name, rows, cols,
+                                      start_y * cols + start_x, end_y * cols + end_x,
+                                      float(fields[8])))
+    return scenarios
+
+
+def scenario_map_path(scen_path, map_name, map_dir=None):
+    # .scen files name their map relative to some benchmark root; try the
+    # given directory, then next to the .scen file
+    for directory in (map_dir, os.path.dirname(scen_path)):
+        if directory is None:
+            continue
+        for candidate in (os.path.join(directory, map_name),
+                          os.path.join(directory, os.path.basename(map_name))):
+            if os.path.exists(candidate):
+                return candidate
+    raise FileNotFoundError(f"map {map_name!r} of {scen_path} not found")
+
+
+def save_grid(path, grid):
+    with open(path, "wb") as file:
+        file.write(GRID_HEADER.pack(GRID_MAGIC, grid.rows, grid.cols))
+        file.write((grid.blocked != 0).astype(np.uint8).tobytes())
+
+
+def load_grid_file(path, writable=False):
+    with open(path, "rb") as file:
+        magic, rows, cols = GRID_HEADER.unpack(file.read(GRID_HEADER.size))
+    if magic != GRID_MAGIC:
+        raise ValueError(f"{path}: not a .grid file")
+    blocked = np.memmap(path, dtype=np.uint8, mode="r+" if writable else "r",
+                        offset=GRID_HEADER.size, shape=(rows * cols,))
+    return core.Grid(rows, cols, blocked)
+
+
+def load_grid(path):
+    # Pick the loader from the file extension
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".map":
+        return load_map(path)
+    if extension == ".grid":
+        return load_grid_file(path)
+    if extension == ".npy":
+        occupancy = np.load(path)
+        rows, cols = occupancy.shape
+        return core.Grid(rows, cols, (occupancy != 0).astype(np.uint8).ravel())
+    raise ValueError(f"{path}: unsupported grid format {extension!r}")
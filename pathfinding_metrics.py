@@ -0,0 +1,53 @@
+"""Cost of one search, computed from its SearchTrace.
+
+The searches only append events to the trace, so untraced runs pay nothing.
+``search_metrics`` turns those events into the numbers worth comparing
+between algorithms and heuristics:
+
+- expanded: nodes taken off the open set and expanded (the start is not
+  traced)
+- generated: successors the search looked at while expanding those nodes,
+  as it counted them: jump points for JPS, abstract edges for HPA*
+- pushes: nodes added to the open set, including re-pushes with a better score
+- stale_pops: outdated open set entries popped and skipped
+- peak_open: largest open set size, counting stale entries still in it
+- length / cost: steps and terrain cost of the path, None when not found
+- status: "found", "no path", or "node limit" when the search raised
+  NodeLimitReached and never decided whether a path exists
+
+Records are plain dicts so they can be written as JSON lines.
+"""
+import json
+
+import numpy as np
+
+import pathfinding_core as core
+
+
+def search_metrics(grid, trace, path, stopped=False):
+    # stopped: the search raised NodeLimitReached, so path is None but the
+    # query is not known to be unsolvable
+    kinds = np.frombuffer(trace.kinds, dtype=np.int8)
+    pushes = int((kinds == core.OPEN).sum())
+    # The start is already popped when the first event is recorded, and
+    # every later pop ends in a close or stale event, so the open set size
+    # after each event is a running sum. Closes are recorded after their
+    # pushes, so this may count the node being expanded as still open.
+    sizes = np.cumsum(np.where(kinds == core.OPEN, 1, -1))
+    return {
+        "expanded": int((kinds == core.CLOSE).sum()),
+        "generated": trace.generated,
+        "pushes": pushes,
+        "stale_pops": int((kinds == core.STALE).sum()),
+        "peak_open": int(sizes.max()) if len(sizes) else 0,
+        "length": None if path is None else len(path) - 1,
+        "cost": None if path is None else core.path_cost(grid, path),
+        "status": "node limit" if stopped else "no path" if path is None else "found",
+    }
+
+
+def write_metrics(path, records):
+    # Append records to a JSON lines file
+    with open(path, "a") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
@@ -1,7 +1,117 @@
 import matplotlib.pyplot as plt
+import numpy as np
 import random
-from matplotlib.animation import FuncAnimation
-from matplotlib.widgets import Button
+from array import array
+from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.widgets import Button, Slider
+from blit_animation import BlitAnimation
+
+
+# Sort events. Each sorting generator yields one (kind, a, b) tuple per
+# operation, after doing it: COMPARE and SWAP name two indexes, WRITE an
+# index and the value written there
+COMPARE = 0
+SWAP = 1
+WRITE = 2
+
+# Fewest events between two snapshots of a SortTrace
+CHECKPOINT_STEPS = 4096
+
+
+class SortTrace:
+    """Events of one sort: three flat integer arrays and a list of written values.
+
+    ``kinds`` holds each event's kind, and ``first`` and ``second`` its array
+    indices. A WRITE's value can be any number (or any object), so it goes to
+    the ``values`` list, a plain Python list, and its ``second`` entry holds
+    the value's position there.
+
+    Besides the events, the trace keeps the array the sort started from and
+    a copy of the array every ``interval`` events, so seek() rebuilds any
+    step from the nearest snapshot instead of replaying from the start.
+    """
+
+    def __init__(self, initial, interval=None):
+        self.initial = list(initial)
+        self.kinds = array("b")
+        self.first = array("q")
+        self.second = array("q")
+        self.values = []  # Written values, in event order
+        # Snapshots cost about as much memory as the events between them
+        self.interval = interval or max(CHECKPOINT_STEPS, len(self.initial))
+        self.snapshots = [self.initial]  # snapshots[k]: state after k * interval events
+
+    @classmethod
+    def record(cls, events, arr, interval=None):
+        # Run a sorting generator over arr to the end without drawing anything
+        trace = cls(arr, interval)
+        kinds, first, second, values, snapshots = trace.kinds, trace.first, trace.second, trace.values, trace.snapshots
+        interval = trace.interval
+        for kind, a, b in events:
+            kinds.append(kind)
+            first.append(a)
+            if kind == WRITE:
+                second.append(len(values))
+                values.append(b)
+            else:
+                second.append(b)
+            if len(kinds) % interval == 0:
+                snapshots.append(list(arr))
+        return trace
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def event(self, step):
+        # (kind, a, b) as the sort yielded it
+        kind, b = self.kinds[step], self.second[step]
+        return kind, self.first[step], self.values[b] if kind == WRITE else b
+
+    def __iter__(self):
+        return map(self.event, range(len(self)))
+
+    def count(self, kind, stop=None):
+        # Events of one kind among the first stop steps
+        return self.kinds[:stop].count(kind) if stop is not None else self.kinds.count(kind)
+
+    @property
+    def comparisons(self):
+        return self.kinds.count(COMPARE)
+
+    @property
+    def swaps(self):
+        return self.kinds.count(SWAP)
+
+    @property
+    def writes(self):
+        return self.kinds.count(WRITE)
+
+    def apply(self, arr, start, stop):
+        # Redo events start..stop-1 on arr in place
+        kinds, first, second, values = self.kinds, self.first, self.second, self.values
+        for step in range(start, stop):
+            kind = kinds[step]
+            if kind == SWAP:
+                a, b = first[step], second[step]
+                arr[a], arr[b] = arr[b], arr[a]
+            elif kind == WRITE:
+                arr[first[step]] = values[second[step]]
+        return arr
+
+    def seek(self, step):
+        """A new list holding the array as it was after ``step`` events."""
+        step = max(0, min(step, len(self)))
+        base = min(step // self.interval, len(self.snapshots) - 1)
+        return self.apply(list(self.snapshots[base]), base * self.interval, step)
+
+    def replay(self, start=0, stop=None):
+        # Yield (kind, a, b, arr) for each event from start on, with arr
+        # already updated by it; arr is the same list every time
+        stop = len(self) if stop is None else min(stop, len(self))
+        arr = self.seek(start)
+        for step in range(start, stop):
+            self.apply(arr, step, step + 1)
+            yield (*self.event(step), arr)
 
 
 # Bubble Sort Algorithm
@@ -9,9 +119,10 @@ def bubble_sort(arr):
     n = len(arr)
     for i in range(n):
         for j in range(0, n - i - 1):
+            yield COMPARE, j, j + 1
             if arr[j] > arr[j + 1]:
                 arr[j], arr[j + 1] = arr[j + 1], arr[j]
-                yield arr
+                yield SWAP, j, j + 1
 
 
 # Selection Sort Algorithm
@@ -20,11 +131,12 @@ def selection_sort(arr):
     for i in range(n):
         min_idx = i
         for j in range(i + 1, n):
+            yield COMPARE, j, min_idx
             if arr[j] < arr[min_idx]:
                 min_idx = j
-            yield arr
-        arr[i], arr[min_idx] = arr[min_idx], arr[i]
-        yield arr
+        if min_idx != i:
+            arr[i], arr[min_idx] = arr[min_idx], arr[i]
+            yield SWAP, i, min_idx
 
 
 # Insertion Sort Algorithm
@@ -32,34 +144,47 @@ def insertion_sort(arr):
     for i in range(1, len(arr)):
         key = arr[i]
         j = i - 1
-        while j >= 0 and arr[j] > key:
+        # Index j + 1 is the hole key will drop into
+        while j >= 0:
+            yield COMPARE, j, j + 1
+            if not arr[j] > key:
+                break
             arr[j + 1] = arr[j]
+            yield WRITE, j + 1, arr[j]
             j -= 1
-            yield arr
-        arr[j + 1] = key
-        yield arr
+        if j + 1 != i:
+            arr[j + 1] = key
+            yield WRITE, j + 1, key
 
 
 # Quick Sort Algorithm
 def quick_sort(arr, low, high):
-    if low < high:
+    # Recurse into the smaller side and loop on the larger one, so sorted
+    # input costs O(n^2) time but only O(log n) stack
+    while low < high:
         pi = yield from partition(arr, low, high)
-        yield arr
-        yield from quick_sort(arr, low, pi - 1)
-        yield from quick_sort(arr, pi + 1, high)
+        if pi - low < high - pi:
+            yield from quick_sort(arr, low, pi - 1)
+            low = pi + 1
+        else:
+            yield from quick_sort(arr, pi + 1, high)
+            high = pi - 1
 
 
 def partition(arr, low, high):
     pivot = arr[high]
     i = low - 1
     for j in range(low, high):
+        yield COMPARE, j, high
         if arr[j] < pivot:
             i += 1
-            arr[i], arr[j] = arr[j], arr[i]
-            yield arr
+            if i != j:
+                arr[i], arr[j] = arr[j], arr[i]
+                yield SWAP, i, j
 
-    arr[i + 1], arr[high] = arr[high], arr[i + 1]
-    yield arr
+    if i + 1 != high:
+        arr[i + 1], arr[high] = arr[high], arr[i + 1]
+        yield SWAP, i + 1, high
     return i + 1
 
 
@@ -79,26 +204,24 @@ def merge(arr, start, mid, end):
     k = start
 
     while i < len(left) and j < len(right):
+        # Where the two candidates came from; left's slots may be overwritten
+        yield COMPARE, start + i, mid + j
         if left[i] <= right[j]:
             arr[k] = left[i]
             i += 1
         else:
             arr[k] = right[j]
             j += 1
+        yield WRITE, k, arr[k]
         k += 1
-        yield arr
 
     while i < len(left):
         arr[k] = left[i]
+        yield WRITE, k, arr[k]
         i += 1
         k += 1
-        yield arr
 
-    while j < len(right):
-        arr[k] = right[j]
-        j += 1
-        k += 1
-        yield arr
+    # The rest of right is already in place
 
 
 # Heap Sort Algorithm
@@ -107,14 +230,18 @@ def heapify(arr, n, i):
     left = 2 * i + 1
     right = 2 * i + 2
 
-    if left < n and arr[left] > arr[largest]:
-        largest = left
-    if right < n and arr[right] > arr[largest]:
-        largest = right
+    if left < n:
+        yield COMPARE, left, largest
+        if arr[left] > arr[largest]:
+            largest = left
+    if right < n:
+        yield COMPARE, right, largest
+        if arr[right] > arr[largest]:
+            largest = right
 
     if largest != i:
         arr[i], arr[largest] = arr[largest], arr[i]
-        yield arr
+        yield SWAP, i, largest
         yield from heapify(arr, n, largest)
 
 
@@ -126,7 +253,7 @@ def heap_sort(arr):
 
     for i in range(n - 1, 0, -1):
         arr[i], arr[0] = arr[0], arr[i]
-        yield arr
+        yield SWAP, 0, i
         yield from heapify(arr, i, 0)
 
 
@@ -136,48 +263,254 @@ def comparison_count_sort(arr):
 
     for i in range(n):
         for j in range(n):
-            if arr[j] < arr[i]:
+            yield COMPARE, j, i
+            # Equal values are ranked by position so each gets its own slot
+            if arr[j] < arr[i] or (arr[j] == arr[i] and j < i):
                 count[i] += 1
-        yield arr
 
     output = [0] * n
     for i in range(n):
         output[count[i]] = arr[i]
-        yield output
 
     for i in range(n):
         arr[i] = output[i]
-        yield arr
+        yield WRITE, i, arr[i]
+
+
+# Bits of the key handled per radix_sort pass
+RADIX_BITS = 8
+
+
+def write_back(arr, items):
+    # Copy a pass's output into arr. WRITE events carry the item itself,
+    # not its key, so replaying them rebuilds the array
+    for i, item in enumerate(items):
+        arr[i] = item
+        yield WRITE, i, item
+
+
+# Counting Sort Algorithm
+def counting_sort(arr, key=None):
+    # Stable and comparison-free: O(n + k) for integer keys spanning k
+    # values. Only min() and max() compare keys, to find that span
+    n = len(arr)
+    if n < 2:
+        return
+    keys = [key(item) for item in arr] if key else list(arr)
+    low = min(keys)
+    count = [0] * (max(keys) - low + 1)
+    for k in keys:
+        count[k - low] += 1
+    position = 0
+    for value, c in enumerate(count):
+        count[value] = position  # Where the first item with this key goes
+        position += c
+
+    items = [None] * n
+    for item, k in zip(arr, keys):
+        items[count[k - low]] = item
+        count[k - low] += 1
+    yield from write_back(arr, items)
+
+
+# Radix Sort Algorithm
+def radix_sort(arr, key=None, bits=RADIX_BITS):
+    # Least significant digit first: one stable counting pass per bits of
+    # the key range, each ending in a write of every element
+    n = len(arr)
+    if n < 2:
+        return
+    keys = [key(item) for item in arr] if key else list(arr)
+    low = min(keys)
+    keys = [k - low for k in keys]  # Negative keys sort as offsets from the smallest
+    items = list(arr)
+    mask = (1 << bits) - 1
+    top = max(keys)
+    shift = 0
+    while top >> shift:
+        count = [0] * (mask + 1)
+        for k in keys:
+            count[(k >> shift) & mask] += 1
+        position = 0
+        for digit, c in enumerate(count):
+            count[digit] = position
+            position += c
+
+        next_items = [None] * n
+        next_keys = [0] * n
+        for item, k in zip(items, keys):
+            digit = (k >> shift) & mask
+            next_items[count[digit]] = item
+            next_keys[count[digit]] = k
+            count[digit] += 1
+        items, keys = next_items, next_keys
+        yield from write_back(arr, items)
+        shift += bits
+
+# Arrays longer than this are drawn as one image instead of bars
+BAR_LIMIT = 500
+
+# Size of that image. A column covers a block of neighboring values, and
+# each of its pixels is shaded by the share of them reaching that row
+IMAGE_ROWS = 256
+IMAGE_COLUMNS = 1024
+
+# Longest animation in frames; longer traces apply several events per frame
+MAX_FRAMES = 600
+
+# Values sorted by the buttons, until the size slider is moved, and the
+# slider's range; image mode starts past BAR_LIMIT
+ARRAY_SIZE = 200
+MIN_ARRAY_SIZE = 10
+MAX_ARRAY_SIZE = 5000
+array_size = ARRAY_SIZE
+
+
+class SortAnimation(BlitAnimation):
+    """Plays a SortTrace, redrawing only the values each frame changes.
+
+    Each frame applies ``step`` events. Up to BAR_LIMIT values the array is
+    drawn as bars. With blitting the bars are animated artists: a frame
+    restores the clean background under the changed columns only, draws
+    those bars and blits. Longer arrays are one image of at most
+    IMAGE_COLUMNS columns, so a frame costs about the same for 1,000 or
+    1,000,000 values: only the columns holding changed values are shaded
+    again, and the image is drawn once. The counts go in the title, whose
+    strip of canvas is restored before every change (see BlitAnimation).
+    """
+
+    def __init__(self, fig, ax, trace, interval, step, mode):
+        super().__init__(fig, ax, interval)
+        self.trace = trace
+        self.step = step
+        self.mode = mode
+        self.state = list(trace.initial)
+        self.position = 0  # Next event to apply
+        self.counts = np.zeros(3, dtype=np.int64)  # Events applied by kind
+        self.kinds = np.frombuffer(trace.kinds, dtype=np.int8)
+        self.first = np.frombuffer(trace.first, dtype=np.int64)
+        self.second = np.frombuffer(trace.second, dtype=np.int64)
+
+        n = len(self.state)
+        top = max(self.state) + 1
+        ax.set_xlim(0, n)
+        ax.set_ylim(0, top)
+        if mode == "bars":
+            self.bar_rects = ax.bar(range(n), self.state, align="edge", animated=self.blit)
+            for rect in self.bar_rects:
+                # Unsmoothed bars cover whole pixels, so restoring one
+                # column of background erases exactly one bar
+                rect.set_antialiased(False)
+        else:
+            self.top = top
+            self.width = -(-n // IMAGE_COLUMNS)  # Values per column
+            columns = -(-n // self.width)
+            # Rows each value fills, padded with empty values up to whole columns
+            self.fills = np.zeros(columns * self.width, dtype=np.int64)
+            self.sizes = np.bincount(np.arange(n) // self.width, minlength=columns)  # Real values per column
+            self.pixels = np.zeros((IMAGE_ROWS, columns))
+            self.fill(range(n))
+            self.image = ax.imshow(self.pixels, origin="lower", extent=(0, self.width * columns, 0, top),
+                                   aspect="auto", vmin=0, vmax=1,
+                                   cmap=LinearSegmentedColormap.from_list("fill", ["white", "C0"]),
+                                   interpolation="antialiased", animated=self.blit)
+        self.update_title()
+
+    def animated_artists(self):
+        return list(self.bar_rects) if self.mode == "bars" else [self.image]
+
+    def draw_animated(self):
+        if self.mode == "bars":
+            # Pixel column where each bar's slot starts, and one past the end
+            edges = np.column_stack([np.arange(len(self.state) + 1), np.zeros(len(self.state) + 1)])
+            self.columns = np.round(self.ax.transData.transform(edges)[:, 0]).astype(int)
+        super().draw_animated()
+
+    def fill(self, changed):
+        # Reshade the image columns holding the changed values. A value
+        # fills the rows whose center it reaches; a histogram of fills per
+        # column, summed from the top, gives how many values reach each row
+        self.fills[changed] = np.clip(np.rint(np.array([self.state[i] for i in changed]) * IMAGE_ROWS / self.top),
+                                      0, IMAGE_ROWS)
+        columns = np.unique(np.asarray(changed, dtype=np.int64) // self.width)
+        fills = self.fills.reshape(-1, self.width)[columns]
+        bins = np.arange(len(columns))[:, None] * (IMAGE_ROWS + 1) + fills
+        counts = np.bincount(bins.ravel(), minlength=len(columns) * (IMAGE_ROWS + 1))
+        reaching = counts.reshape(-1, IMAGE_ROWS + 1)[:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:]
+        self.pixels[:, columns] = (reaching / self.sizes[columns][:, None]).T
+
+    def update_title(self):
+        comparisons, swaps, writes = self.counts
+        self.ax.set_title(f"Comparisons: {comparisons}  Swaps: {swaps}  Writes: {writes}  "
+                          f"({self.position}/{len(self.trace)} steps)", fontsize=10)
+
+    def advance(self):
+        if self.position >= len(self.trace):
+            self.timer.stop()
+            return False
+        start, stop = self.position, min(self.position + self.step, len(self.trace))
+        kinds = self.kinds[start:stop]
+        changed = np.unique(np.concatenate([self.first[start:stop][kinds != COMPARE],
+                                            self.second[start:stop][kinds == SWAP]])).tolist()
+        self.counts += np.bincount(kinds, minlength=3)
+        self.trace.apply(self.state, start, stop)
+        self.position = stop
+        self.update_title()
+
+        canvas, state = self.fig.canvas, self.state
+        if self.mode == "bars":
+            for i in changed:
+                self.bar_rects[i].set_height(state[i])
+        elif changed:
+            self.fill(changed)
+            self.image.set_data(self.pixels)
+
+        if not self.blit or self.background is None:
+            canvas.draw_idle()
+            return True
+        box = self.axes_box()
+        if self.mode == "bars":
+            # One box per run of neighboring changed bars, full height
+            runs = np.split(np.array(changed, dtype=np.int64),
+                            np.flatnonzero(np.diff(changed) != 1) + 1) if changed else []
+            for run in runs:
+                self.redraw((self.columns[run[0]], box[1], self.columns[run[-1] + 1], box[3]),
+                            [self.bar_rects[i] for i in run])
+        else:
+            self.redraw(box, [self.image])
+        self.blit_frame()
+        return True
+
 
 # Visualization Function
-def visualize(sort_algorithm, arr):
+def visualize(sort_algorithm, arr, interval=50, step=None, mode="auto"):
     global anim  # Use a global variable to allow stopping/restarting animations
+    # Record the whole sort first; frames then replay the trace. Each frame
+    # applies step events, by default enough to finish in about MAX_FRAMES
+    # frames. mode is "bars", "image", or "auto" to pick by length
+    trace = SortTrace.record(sort_algorithm(arr), arr)
+    if mode == "auto":
+        mode = "bars" if len(trace.initial) <= BAR_LIMIT else "image"
+    if step is None:
+        step = max(1, -(-len(trace) // MAX_FRAMES))
+
     fig, ax = plt.subplots()
     plt.subplots_adjust(bottom=0.2)  # Reserve space for buttons at the bottom
-
-    bar_rects = ax.bar(range(len(arr)), arr, align="edge")
-    ax.set_xlim(0, len(arr))
-    ax.set_ylim(0, max(arr) + 1)
-    text = ax.text(0.02, 0.95, "", transform=ax.transAxes)
-    iteration = [0]
-
-    def update_fig(frame):
-        # Update the bar heights
-        for rect, val in zip(bar_rects, frame):
-            rect.set_height(val)
-        iteration[0] += 1
-        text.set_text(f"# of operations: {iteration[0]}")
-
-    # Create the animation
-    anim = FuncAnimation(
-        fig,
-        func=update_fig,
-        frames=sort_algorithm(arr),
-        interval=50,
-        repeat=False,
-        cache_frame_data=False  # Disable caching to avoid warnings
-    )
+    anim = SortAnimation(fig, ax, trace, interval, step, mode)
     plt.show()
+    return anim
+
+
+def random_array(size=None):
+    if size is None:
+        size = array_size
+    return [random.randint(1, 100) for _ in range(size)]
+
+
+# Slider Callback for the Array Size
+def set_array_size(value):
+    global array_size
+    array_size = int(value)
 
 
 # Button Callback for Bubble Sort
@@ -185,7 +518,7 @@ def start_bubble_sort(event):
     # global anim  # Stop any ongoing animation
     # if 'anim' in globals():
     #     anim._stop()  # Stop the current animation
-    arr = [random.randint(1, 100) for _ in range(50)]
+    arr = random_array()
     visualize(bubble_sort, arr.copy())
 
 
@@ -194,7 +527,7 @@ def start_selection_sort(event):
     # global anim  # Stop any ongoing animation
     # if 'anim' in globals():
     #     anim._stop()  # Stop the current animation
-    arr = [random.randint(1, 100) for _ in range(50)]
+    arr = random_array()
     visualize(selection_sort, arr.copy())
 
 
@@ -203,7 +536,7 @@ def start_insertion_sort(event):
     # global anim  # Stop any ongoing animation
     # if 'anim' in globals():
     #     anim._stop()  # Stop the current animation
-    arr = [random.randint(1, 100) for _ in range(50)]
+    arr = random_array()
     visualize(insertion_sort, arr.copy())
 
 
@@ -212,7 +545,7 @@ def start_quick_sort(event):
     # global anim  # Stop any ongoing animation
     # if 'anim' in globals():
     #     anim._stop()  # Stop the current animation
-    arr = [random.randint(1, 100) for _ in range(50)]
+    arr = random_array()
     visualize(lambda arr: quick_sort(arr, 0, len(arr) - 1), arr.copy())
 
 
@@ -221,7 +554,7 @@ def start_merge_sort(event):
     # global anim  # Stop any ongoing animation
     # if 'anim' in globals():
     #     anim._stop()  # Stop the current animation
-    arr = [random.randint(1, 100) for _ in range(50)]
+    arr = random_array()
     visualize(lambda arr: merge_sort(arr, 0, len(arr)), arr.copy())
 
 
@@ -230,7 +563,7 @@ def start_heap_sort(event):
     # global anim  # Stop any ongoing animation
     # if 'anim' in globals():
     #     anim._stop()  # Stop the current animation
-    arr = [random.randint(1, 100) for _ in range(50)]
+    arr = random_array()
     visualize(heap_sort, arr.copy())
 
 # Button Callback for Count Sort
@@ -238,23 +571,36 @@ def start_count_sort(event):
     # global anim  # Stop any ongoing animation
     # if 'anim' in globals():
     #     anim._stop()  # Stop the current animation
-    arr = [random.randint(1, 100) for _ in range(50)]
+    arr = random_array()
     visualize(comparison_count_sort, arr.copy())
 
+# Button Callback for Counting Sort
+def start_counting_sort(event):
+    arr = random_array()
+    visualize(counting_sort, arr.copy())
+
+# Button Callback for Radix Sort
+def start_radix_sort(event):
+    arr = random_array()
+    visualize(radix_sort, arr.copy())
+
 # Main Function with Buttons
 if __name__ == "__main__":
     # Create the main figure
     # fig, ax = plt.subplots()
     # plt.subplots_adjust(bottom=0.2)  # Reserve space for buttons at the bottom
 
-    # Add buttons
+    # Add the size slider and buttons
+    ax_size = plt.axes([0.25, 0.88, 0.5, 0.04])
     ax_bubble = plt.axes([0.10, 0.70, 0.2, 0.075])  # [x, y, width, height]
     ax_select = plt.axes([0.40, 0.70, 0.2, 0.075])
     ax_insert = plt.axes([0.70, 0.70, 0.2, 0.075])
     ax_quick = plt.axes([0.10, 0.40, 0.2, 0.075])
     ax_merge = plt.axes([0.40, 0.40, 0.2, 0.075])
     ax_heap = plt.axes([0.70, 0.40, 0.2, 0.075])
-    ax_count = plt.axes([0.30, 0.10, 0.4, 0.075])
+    ax_count = plt.axes([0.05, 0.10, 0.35, 0.075])
+    ax_counting = plt.axes([0.45, 0.10, 0.2, 0.075])
+    ax_radix = plt.axes([0.70, 0.10, 0.2, 0.075])
 
     btn_bubble = Button(ax_bubble, "Bubble Sort")
     btn_select = Button(ax_select, "Selection Sort")
@@ -263,6 +609,10 @@ if __name__ == "__main__":
     btn_merge = Button(ax_merge, "Merge Sort")
     btn_heap = Button(ax_heap, "Heap Sort")
     btn_count = Button(ax_count, "Comparison Counting Sort")
+    btn_counting = Button(ax_counting, "Counting Sort")
+    btn_radix = Button(ax_radix, "Radix Sort")
+    size_slider = Slider(ax_size, "Array size", MIN_ARRAY_SIZE, MAX_ARRAY_SIZE, valinit=ARRAY_SIZE,
+                         valstep=10, valfmt="%d")
 
     # Attach callback functions to buttons
     btn_bubble.on_clicked(start_bubble_sort)
@@ -272,5 +622,8 @@ if __name__ == "__main__":
     btn_merge.on_clicked(start_merge_sort)
     btn_heap.on_clicked(start_heap_sort)
     btn_count.on_clicked(start_count_sort)
+    btn_counting.on_clicked(start_counting_sort)
+    btn_radix.on_clicked(start_radix_sort)
+    size_slider.on_changed(set_array_size)
 
     plt.show()
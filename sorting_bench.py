@@ -0,0 +1,238 @@
+"""Benchmark the sorts of sorting.py without opening a window.
+
+Every (distribution, size) input is sorted by every selected algorithm
+twice: once through its plain function in sorting_plain for the wall time
+(best of --repeat runs), and once through its generator in sorting.py with
+tracemalloc running, counting the compare/swap/write events it yields and
+the peak Python/NumPy allocation. Both make the same moves, so the counts
+belong to the timed run. ``sorted()`` and ``numpy.sort`` are timed too as
+baselines; their counts are left empty.
+
+Sorts are skipped above --quadratic-limit elements on inputs where they
+take O(n^2) time, which keeps a default run under a minute.
+
+One record per (algorithm, distribution, size) is written to the report,
+as CSV when its name ends in .csv and as JSON lines otherwise; --plot also
+saves time against size on log-log axes, one panel per distribution.
+
+Usage:
+    python sorting_bench.py [--sizes 100 1000 10000] [--distributions random sorted ...]
+                            [--algorithms quick merge ...] [--output report.csv] [--plot scaling.png]
+"""
+import argparse
+import csv
+import json
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+import sorting
+import sorting_plain as plain
+
+# name -> (plain function, event generator); both sort the list in place
+ALGORITHMS = {
+    "bubble": (plain.bubble_sort, sorting.bubble_sort),
+    "selection": (plain.selection_sort, sorting.selection_sort),
+    "insertion": (plain.insertion_sort, sorting.insertion_sort),
+    "quick": (lambda arr: plain.quick_sort(arr, 0, len(arr) - 1),
+              lambda arr: sorting.quick_sort(arr, 0, len(arr) - 1)),
+    "merge": (lambda arr: plain.merge_sort(arr, 0, len(arr)),
+              lambda arr: sorting.merge_sort(arr, 0, len(arr))),
+    "heap": (plain.heap_sort, sorting.heap_sort),
+    "comparison_count": (plain.comparison_count_sort, sorting.comparison_count_sort),
+    "counting": (plain.counting_sort, sorting.counting_sort),
+    "radix": (plain.radix_sort, sorting.radix_sort),
+}
+
+# Timed only; they return a new sorted sequence
+BASELINES = {
+    "sorted": sorted,
+    "numpy.sort": np.sort,
+}
+
+# O(n^2) on (nearly) every input
+QUADRATIC = {"bubble", "selection", "insertion", "comparison_count"}
+
+# Quadratic only on some inputs: quick sort's last-element pivot splits
+# ordered runs and repeated values one to n - 1
+QUADRATIC_ON = {"quick": {"sorted", "reversed", "few-unique", "nearly-sorted"}}
+
+DISTRIBUTIONS = ["random", "sorted", "reversed", "few-unique", "nearly-sorted"]
+
+# Distinct values of the few-unique inputs
+FEW_UNIQUE = 10
+
+# Share of the elements moved by random swaps in nearly-sorted inputs
+NEARLY_SORTED_SWAPS = 0.01
+
+FIELDS = ["algorithm", "distribution", "size", "time_s", "comparisons", "swaps", "writes",
+          "peak_bytes", "correct"]
+
+
+def make_input(distribution, size, rng, max_value):
+    values = [rng.randrange(max_value) for _ in range(size)]
+    if distribution == "random":
+        return values
+    if distribution == "sorted":
+        return sorted(values)
+    if distribution == "reversed":
+        return sorted(values, reverse=True)
+    if distribution == "few-unique":
+        choices = [rng.randrange(max_value) for _ in range(FEW_UNIQUE)]
+        return [rng.choice(choices) for _ in range(size)]
+    if distribution == "nearly-sorted":
+        values.sort()
+        swaps = max(1, int(size * NEARLY_SORTED_SWAPS)) if size > 1 else 0
+        for _ in range(swaps):
+            a, b = rng.randrange(size), rng.randrange(size)
+            values[a], values[b] = values[b], values[a]
+        return values
+    raise ValueError(f"unknown distribution {distribution!r}")
+
+
+def time_plain(sort, values, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        arr = list(values)
+        began = time.perf_counter()
+        sort(arr)
+        best = min(best, time.perf_counter() - began)
+    return best, arr
+
+
+def count_events(events_for, values):
+    # Run the generator to the end under tracemalloc; no trace is kept, so
+    # memory stays flat however many events there are
+    arr = list(values)
+    counts = [0, 0, 0]
+    tracemalloc.start()
+    for kind, _, _ in events_for(arr):
+        counts[kind] += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return counts, peak, arr
+
+
+def time_baseline(name, values, repeat):
+    # numpy.sort gets an array built outside the timer
+    data = np.array(values) if name == "numpy.sort" else values
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = BASELINES[name](data)
+        best = min(best, time.perf_counter() - began)
+    return best, list(result)
+
+
+def benchmark(sizes, distributions=DISTRIBUTIONS, names=tuple(ALGORITHMS), baselines=tuple(BASELINES),
+              repeat=3, quadratic_limit=5000, max_value=1_000_000, seed=0, counts=True):
+    # Yields one record per (algorithm, distribution, size)
+    rng = random.Random(seed)
+    for size in sizes:
+        for distribution in distributions:
+            values = make_input(distribution, size, rng, max_value)
+            expected = sorted(values)
+            for name in names:
+                quadratic = name in QUADRATIC or distribution in QUADRATIC_ON.get(name, ())
+                if quadratic and size > quadratic_limit:
+                    continue
+                sort, events_for = ALGORITHMS[name]
+                elapsed, result = time_plain(sort, values, repeat)
+                record = {"algorithm": name, "distribution": distribution, "size": size, "time_s": elapsed,
+                          "comparisons": None, "swaps": None, "writes": None, "peak_bytes": None,
+                          "correct": result == expected}
+                if counts:
+                    (comparisons, swaps, writes), peak, traced = count_events(events_for, values)
+                    record.update(comparisons=comparisons, swaps=swaps, writes=writes, peak_bytes=peak,
+                                  correct=record["correct"] and traced == expected)
+                yield record
+            for name in baselines:
+                elapsed, result = time_baseline(name, values, repeat)
+                yield {"algorithm": name, "distribution": distribution, "size": size, "time_s": elapsed,
+                       "comparisons": None, "swaps": None, "writes": None, "peak_bytes": None,
+                       "correct": result == expected}
+
+
+def write_report(path, records):
+    with open(path, "w", newline="") as report:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(report, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        else:
+            for record in records:
+                report.write(json.dumps(record) + "\n")
+
+
+def summarize(records):
+    # Milliseconds by algorithm and size, one column per distribution
+    distributions = list(dict.fromkeys(record["distribution"] for record in records))
+    table = defaultdict(dict)
+    for record in records:
+        table[record["algorithm"], record["size"]][record["distribution"]] = record
+    print(f"{'algorithm':<17} {'size':>8} " + " ".join(f"{name:>14}" for name in distributions))
+    for (name, size), row in table.items():
+        cells = [f"{1000 * row[d]['time_s']:>14.3f}" if d in row else f"{'-':>14}" for d in distributions]
+        print(f"{name:<17} {size:>8} " + " ".join(cells))
+    wrong = [record for record in records if not record["correct"]]
+    for record in wrong:
+        print(f"WRONG RESULT: {record['algorithm']} on {record['distribution']} x {record['size']}")
+
+
+def plot_scaling(path, records):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    distributions = list(dict.fromkeys(record["distribution"] for record in records))
+    fig, axes = plt.subplots(1, len(distributions), figsize=(4 * len(distributions), 4), squeeze=False,
+                             sharey=True)
+    for ax, distribution in zip(axes[0], distributions):
+        curves = defaultdict(list)
+        for record in records:
+            if record["distribution"] == distribution:
+                curves[record["algorithm"]].append((record["size"], record["time_s"]))
+        for name, points in curves.items():
+            points.sort()
+            ax.plot(*zip(*points), marker="o", label=name)
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_title(distribution)
+        ax.set_xlabel("size")
+    axes[0][0].set_ylabel("seconds")
+    axes[0][-1].legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sorts of sorting.py headlessly.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000], help="input lengths")
+    parser.add_argument("--distributions", nargs="+", default=DISTRIBUTIONS, choices=DISTRIBUTIONS)
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS),
+                        help="sorts to run (default: all)")
+    parser.add_argument("--baselines", nargs="*", default=list(BASELINES), choices=list(BASELINES),
+                        help="reference sorts to time (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per input, the best is kept")
+    parser.add_argument("--quadratic-limit", type=int, default=5000,
+                        help="skip sorts that are O(n^2) on an input above this size")
+    parser.add_argument("--max-value", type=int, default=1_000_000, help="values are drawn from [0, max)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-counts", action="store_true", help="skip the event-counting run")
+    parser.add_argument("--output", default="sorting_bench.csv", help="report, CSV or JSON lines")
+    parser.add_argument("--plot", help="save a log-log plot of time against size here")
+    args = parser.parse_args()
+
+    records = list(benchmark(args.sizes, args.distributions, args.algorithms, args.baselines, args.repeat,
+                             args.quadratic_limit, args.max_value, args.seed, not args.no_counts))
+    write_report(args.output, records)
+    summarize(records)
+    if args.plot:
+        plot_scaling(args.plot, records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""The sorts of sorting.py as plain functions, for timing.
+
+Each function makes exactly the comparisons, swaps and writes of its
+generator in sorting.py, in the same order, but yields nothing, so the
+event counts of a traced run describe the timed run too. All of them sort
+the list in place.
+
+counting_sort and radix_sort are the exception: they run their passes as
+NumPy array operations, for integer keys that fit in int64. They still do
+the generator's passes, with the same digits, and so leave the same list.
+"""
+import numpy as np
+
+from sorting import RADIX_BITS
+
+
+def bubble_sort(arr):
+    n = len(arr)
+    for i in range(n):
+        for j in range(0, n - i - 1):
+            if arr[j] > arr[j + 1]:
+                arr[j], arr[j + 1] = arr[j + 1], arr[j]
+
+
+def selection_sort(arr):
+    n = len(arr)
+    for i in range(n):
+        min_idx = i
+        for j in range(i + 1, n):
+            if arr[j] < arr[min_idx]:
+                min_idx = j
+        if min_idx != i:
+            arr[i], arr[min_idx] = arr[min_idx], arr[i]
+
+
+def insertion_sort(arr):
+    for i in range(1, len(arr)):
+        key = arr[i]
+        j = i - 1
+        while j >= 0 and arr[j] > key:
+            arr[j + 1] = arr[j]
+            j -= 1
+        if j + 1 != i:
+            arr[j + 1] = key
+
+
+def quick_sort(arr, low, high):
+    while low < high:
+        pi = partition(arr, low, high)
+        if pi - low < high - pi:
+            quick_sort(arr, low, pi - 1)
+            low = pi + 1
+        else:
+            quick_sort(arr, pi + 1, high)
+            high = pi - 1
+
+
+def partition(arr, low, high):
+    pivot = arr[high]
+    i = low - 1
+    for j in range(low, high):
+        if arr[j] < pivot:
+            i += 1
+            if i != j:
+                arr[i], arr[j] = arr[j], arr[i]
+
+    if i + 1 != high:
+        arr[i + 1], arr[high] = arr[high], arr[i + 1]
+    return i + 1
+
+
+def merge_sort(arr, start, end):
+    if end - start > 1:
+        mid = (start + end) // 2
+        merge_sort(arr, start, mid)
+        merge_sort(arr, mid, end)
+        merge(arr, start, mid, end)
+
+
+def merge(arr, start, mid, end):
+    left = arr[start:mid]
+    right = arr[mid:end]
+    i = j = 0
+    k = start
+
+    while i < len(left) and j < len(right):
+        if left[i] <= right[j]:
+            arr[k] = left[i]
+            i += 1
+        else:
+            arr[k] = right[j]
+            j += 1
+        k += 1
+
+    while i < len(left):
+        arr[k] = left[i]
+        i += 1
+        k += 1
+
+
+def heapify(arr, n, i):
+    # Iterative sift-down; the generator recurses, but makes the same moves
+    while True:
+        largest = i
+        left = 2 * i + 1
+        right = 2 * i + 2
+
+        if left < n and arr[left] > arr[largest]:
+            largest = left
+        if right < n and arr[right] > arr[largest]:
+            largest = right
+
+        if largest == i:
+            return
+        arr[i], arr[largest] = arr[largest], arr[i]
+        i = largest
+
+
+def heap_sort(arr):
+    n = len(arr)
+
+    for i in range(n // 2 - 1, -1, -1):
+        heapify(arr, n, i)
+
+    for i in range(n - 1, 0, -1):
+        arr[i], arr[0] = arr[0], arr[i]
+        heapify(arr, i, 0)
+
+
+def comparison_count_sort(arr):
+    n = len(arr)
+    count = [0] * n
+
+    for i in range(n):
+        for j in range(n):
+            if arr[j] < arr[i] or (arr[j] == arr[i] and j < i):
+                count[i] += 1
+
+    output = [0] * n
+    for i in range(n):
+        output[count[i]] = arr[i]
+
+    arr[:] = output
+
+
+def integer_keys(arr, key):
+    keys = np.fromiter(map(key, arr), dtype=np.int64, count=len(arr)) if key else np.array(arr, dtype=np.int64)
+    low = int(keys.min())
+    return keys - low, low
+
+
+def counting_sort(arr, key=None):
+    if len(arr) < 2:
+        return
+    keys, low = integer_keys(arr, key)
+    if key is None:
+        # The counts are the whole answer: each value, repeated
+        counts = np.bincount(keys)
+        arr[:] = np.repeat(np.arange(low, low + len(counts)), counts).tolist()
+        return
+    # NumPy's stable sort is a counting radix sort for 8 and 16 bit
+    # integers, so keys spanning up to 2**16 values stay O(n + k)
+    order = np.argsort(keys.astype(np.min_scalar_type(int(keys.max()))), kind="stable")
+    arr[:] = [arr[i] for i in order.tolist()]
+
+
+def radix_sort(arr, key=None, bits=RADIX_BITS):
+    if len(arr) < 2:
+        return
+    keys, low = integer_keys(arr, key)
+    digit_type = np.min_scalar_type((1 << bits) - 1)
+    mask = (1 << bits) - 1
+    order = np.arange(len(arr))
+    top = int(keys.max())
+    shift = 0
+    while top >> shift:
+        # One stable pass on this digit, as a permutation of the last order
+        digits = ((keys[order] >> shift) & mask).astype(digit_type)
+        order = order[np.argsort(digits, kind="stable")]
+        shift += bits
+    if key is None:
+        arr[:] = (keys[order] + low).tolist()
+    else:
+        arr[:] = [arr[i] for i in order.tolist()]
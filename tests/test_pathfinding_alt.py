@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+import pathfinding_core as core
+from pathfinding_alt import Landmarks
+
+
+def test_tables_round_trip_without_suffix(tmp_path, monkeypatch):
+    grid = core.Grid(12, 12)
+    grid.blocked.reshape(12, 12)[6, :10] = 1
+    path = tmp_path / "landmarks"
+    built = Landmarks(grid, 4, path)
+    assert (tmp_path / "landmarks.npz").exists()
+
+    loaded = Landmarks(grid, 4)
+    assert loaded.load(path)
+    assert loaded.cells == built.cells
+    assert np.array_equal(loaded.tables, built.tables)
+
+    # Reopening with the same path reuses the file instead of rebuilding
+    monkeypatch.setattr(Landmarks, "build", lambda self: pytest.fail("tables rebuilt"))
+    reopened = Landmarks(grid, 4, str(path))
+    assert reopened.cells == built.cells
@@ -0,0 +1,25 @@
+import numpy as np
+
+import pathfinding_core as core
+from pathfinding_batch import solve_batch
+
+
+def weighted_diagonal_grid():
+    rng = np.random.default_rng(0)
+    grid = core.Grid(20, 20, diagonal=True, corner_cutting=core.CUT_ONE_SIDE)
+    grid.blocked[:] = rng.random(grid.size) < 0.15
+    for cell in range(grid.size):
+        grid.set_cost(cell, int(rng.integers(1, 6)))
+    free = np.flatnonzero(grid.blocked == 0)
+    starts, ends = rng.choice(free, (2, 12))
+    return grid, starts, ends
+
+
+def test_workers_share_costs_and_move_rules():
+    grid, starts, ends = weighted_diagonal_grid()
+    local = solve_batch(grid, starts, ends, "A*", workers=1)
+    pooled = solve_batch(grid, starts, ends, "A*", workers=2, chunk_size=3)
+    assert local["found"].any()
+    for column in ("found", "stopped", "length", "offsets", "cells"):
+        assert np.array_equal(local[column], pooled[column]), column
+    assert np.array_equal(local["cost"], pooled["cost"], equal_nan=True)
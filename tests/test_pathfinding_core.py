@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import pathfinding_core as core
+
+
+def expansions(search, grid, start, end):
+    trace = core.SearchTrace()
+    path = search(grid, start, end, trace)
+    return path, sum(1 for kind in trace.kinds if kind == core.CLOSE)
+
+
+def warehouse(diagonal):
+    # Rows of shelves with aisles between them
+    grid = core.Grid(64, 64, diagonal=diagonal)
+    blocked = grid.blocked.reshape(64, 64)
+    for row in range(4, 60, 4):
+        for col in range(4, 56, 12):
+            blocked[row, col:col + 9] = 1
+    return grid
+
+
+@pytest.mark.parametrize("diagonal", [False, True])
+def test_jps_matches_a_star_costs(diagonal):
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        rows, cols = (int(size) for size in rng.integers(1, 12, size=2))
+        grid = core.Grid(rows, cols, diagonal=diagonal)
+        grid.blocked[:] = rng.random(grid.size) < 0.3
+        free = np.flatnonzero(grid.blocked == 0)
+        if len(free) == 0:
+            continue
+        for start, end in rng.choice(free, (3, 2)).tolist():
+            expected = core.a_star(grid, start, end)
+            path = core.jump_point_search(grid, start, end)
+            if expected is None:
+                assert path is None
+                continue
+            assert path[0] == start and path[-1] == end
+            assert all(b in grid.neighbors(a) for a, b in zip(path, path[1:]))
+            assert core.path_cost(grid, path) == core.path_cost(grid, expected)
+
+
+@pytest.mark.parametrize("diagonal", [False, True])
+@pytest.mark.parametrize("make_grid", [lambda diagonal: core.Grid(200, 200, diagonal=diagonal), warehouse],
+                         ids=["empty", "warehouse"])
+def test_jps_expands_fewer_nodes_than_a_star(make_grid, diagonal):
+    grid = make_grid(diagonal)
+    start, end = grid.index(1, 2), grid.index(grid.rows - 2, grid.cols - 3)
+    expected, a_star_expanded = expansions(core.a_star, grid, start, end)
+    path, jps_expanded = expansions(core.jump_point_search, grid, start, end)
+    assert core.path_cost(grid, path) == core.path_cost(grid, expected)
+    assert jps_expanded < a_star_expanded
+
+
+def test_jps_follows_barrier_edits():
+    grid = core.Grid(10, 10)
+    start, end = grid.index(0, 0), grid.index(0, 9)
+    assert len(core.jump_point_search(grid, start, end)) == 10
+    for row in range(9):
+        grid.set_barrier(grid.index(row, 5))
+    assert len(core.jump_point_search(grid, start, end)) == 28